@@ -0,0 +1,37 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Measure the performance of the worker's building blocks.
+
+Run `python -m benchmarks` from the root of the repository; the same
+ENVVARs as for running the tests need to be set.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+test_data_base_path = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "tests", "data")
+)
+pv_fmu_filepath = os.path.join(
+    test_data_base_path, "c02f1f12-966d-4eab-9f21-dcf265ceac71", "model_instance.fmu"
+)
+
+
+def measure(func, *args, repeat=3, **kwargs):
+    """Return the result of `func` and the shortest of `repeat` runtimes."""
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        durations.append(time.perf_counter() - start)
+
+    return result, min(durations)
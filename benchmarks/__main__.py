@@ -0,0 +1,78 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import argparse
+import json
+import sys
+
+from benchmarks import compare, preprocessing, serialization, stages
+
+SUITES = {
+    "serialization": serialization.run,
+    "jsonld": serialization.run_jsonld,
+    "preprocessing": preprocessing.run,
+    "stages": stages.run,
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "suites",
+        nargs="*",
+        default=list(SUITES),
+        help=f"benchmarks to run: {', '.join(SUITES)} (default: all)",
+    )
+    parser.add_argument("--output", help="store the report as JSON in this file")
+    parser.add_argument("--compare", help="compare to a report stored before")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative slowdown reported as regression (default: 0.2)",
+    )
+
+    args = parser.parse_args(argv)
+    for name in args.suites:
+        if name not in SUITES:
+            parser.error(f"unknown benchmark {name!r}")
+
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    report = []
+    for name in args.suites:
+        report.extend(SUITES[name]())
+
+    for entry in report:
+        print(json.dumps(entry))
+
+    if args.output is not None:
+        compare.save_report(report, args.output)
+
+    if args.compare is not None:
+        baseline = compare.load_report(args.compare)
+        comparison = compare.compare_reports(
+            report, baseline["results"], args.tolerance
+        )
+        print(f"Compared to {baseline['commit']} ({baseline['date']}):")
+        for item in comparison:
+            print(json.dumps(item))
+
+        regressions = [x for x in comparison if x["regression"] is True]
+        if regressions:
+            print(f"{len(regressions)} of {len(comparison)} benchmarks regressed")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Store benchmark reports and compare them between versions."""
+
+import datetime
+import json
+import platform
+import subprocess
+
+# Properties of a report entry that are measured rather than identifying it
+MEASUREMENTS = ("legacy", "current", "speedup")
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_report(report, filepath):
+    """Write report to file, together with the version it was measured for."""
+
+    data = {
+        "commit": get_commit(),
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": report,
+    }
+    with open(filepath, "w", encoding="utf8") as fp:
+        json.dump(data, fp, indent=2)
+
+
+def load_report(filepath):
+    with open(filepath, encoding="utf8") as fp:
+        return json.load(fp)
+
+
+def entry_key(entry):
+    return tuple(sorted((k, v) for k, v in entry.items() if k not in MEASUREMENTS))
+
+
+def compare_reports(report, baseline, tolerance=0.2):
+    """
+    Compare the runtime of each entry to the same entry in `baseline`.
+
+    Return one item per entry found in both reports; it is a regression
+    iff the current runtime exceeds the baseline by more than `tolerance`.
+    """
+
+    previous = {entry_key(x): x for x in baseline}
+
+    comparison = []
+    for entry in report:
+        other = previous.get(entry_key(entry))
+        if other is None:
+            continue
+
+        ratio = entry["current"] / other["current"]
+        comparison.append(
+            {
+                **{k: v for k, v in entry.items() if k not in MEASUREMENTS},
+                "baseline": other["current"],
+                "current": entry["current"],
+                "ratio": ratio,
+                "regression": ratio > 1 + tolerance,
+            }
+        )
+
+    return comparison
@@ -0,0 +1,163 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Provide superseded implementations as reference for parity checks."""
+
+import json
+
+import fmpy
+import nanoid
+import numpy as np
+import pandas as pd
+import pendulum
+import rdflib
+from pydash import py_
+from rdflib.namespace import RDF, SOSA, TIME, XSD
+
+from worker.worker import QUDT, UNIT, graph_bind_prefixes
+
+
+def df_to_repr_json(df, fmu, time_is_relative):
+    """Render JSON-representation of DataFrame."""
+
+    # Read model description
+    desc = fmpy.read_model_description(fmu)
+
+    # Transform columns of dataframe to JSON-object
+    data = []
+    for cname in df.columns:
+        # Find unit of quantity
+        model_variable = py_.find(desc.modelVariables, lambda x: x.name == cname)
+        if model_variable.unit is not None:
+            unit = model_variable.unit
+        else:
+            unit = "1"
+
+        # Transform dataframe to timeseries-object
+        ts_value_objects = json.loads(
+            df[cname]
+            .to_json(orient="table")
+            .replace("time", "timestamp")
+            .replace(cname, "value")
+        )["data"]
+        if time_is_relative is False:
+            for x in ts_value_objects:
+                x["datetime"] = pendulum.parse(x["timestamp"]).isoformat()
+                x["timestamp"] = int(pendulum.parse(x["timestamp"]).format("x"))
+
+        # Join label, unit and data
+        data.append(
+            {
+                "label": cname,
+                "unit": unit,
+                "timeseries": ts_value_objects,
+            }
+        )
+
+    # Return JSON-representation of entire dataframe _without_ additional content
+    return data
+
+
+def df_to_repr_jsonld(df, fmu, time_is_relative):
+    """Render JSON-LD-representation of DataFrame."""
+
+    unit_map = {
+        "W": UNIT.W,
+        "kW.h": UNIT["KiloW-HR"],
+        "deg": UNIT.DEG,
+    }
+
+    # Read model description
+    desc = fmpy.read_model_description(fmu)
+
+    # Iterate over columns of dataframe
+    graph = graph_bind_prefixes(rdflib.Graph())
+    for label, series in df.items():
+        # Set unit to '1' if it is undefined
+        # https://github.com/CATIA-Systems/FMPy/blob/master/fmpy/model_description.py#L154
+        model_variable = py_.find(desc.modelVariables, lambda x: x.name == label)
+        if model_variable.unit is not None:
+            unit = model_variable.unit
+        else:
+            unit = "1"
+
+        # Define `sosa:ObservableProperty` for each column
+        observable_iri = f"#{label}"
+        observable_uriref = rdflib.URIRef(observable_iri)
+        graph.add((observable_uriref, RDF.type, SOSA.ObservableProperty))
+
+        for index, value in series.items():
+            # Define `sosa:Observation` for each row
+            observation_id = f"#{nanoid.generate(size=8)}"
+            observation_uriref = rdflib.URIRef(observation_id)
+            graph.add((observation_uriref, RDF.type, SOSA.Observation))
+            graph.add((observation_uriref, SOSA.observedProperty, observable_uriref))
+
+            # Define `qudt:QuantityValue` for each value
+            result_uriref = rdflib.URIRef(f"{observation_id}_result")
+            graph.add((result_uriref, RDF.type, QUDT.QuantityValue))
+            graph.add((result_uriref, QUDT.numericValue, rdflib.Literal(float(value))))
+            graph.add((result_uriref, QUDT.unit, unit_map[unit]))
+            graph.add((observation_uriref, SOSA.hasResult, result_uriref))
+
+            # Define `time:Instant` for each index
+            time_uriref = rdflib.URIRef(f"{observation_id}_time")
+            time_literal = rdflib.Literal(index, datatype=XSD.dateTimeStamp)
+            graph.add((time_uriref, RDF.type, TIME.Instant))
+            graph.add((time_uriref, TIME.inXSDDateTimeStamp, time_literal))
+            graph.add((observation_uriref, SOSA.phenomenonTime, time_uriref))
+
+    return json.loads(graph.serialize(format="application/ld+json"))
+
+
+def timeseries_dict_to_pd_series(ts_dict):
+    """
+    Turn timeseries object v1.3.0 into sorted pd.Series.
+
+    Input schema defined in /schemata/timeseries/schema_v1.3.0-oas2.json
+    at https://github.com/UdSAES/designetz_schemata.
+    The data is not changed, just represented differently!
+    """
+
+    timestamps = []
+    values = []
+
+    for obj in ts_dict["timeseries"]:
+        timestamps.append(obj["timestamp"])
+        values.append(obj["value"])
+
+    s = pd.Series(values, index=timestamps, name=ts_dict["label"])
+    s.sort_index(inplace=True)
+
+    return s
+
+
+def prepare_bc_for_fmpy(ts, is_relative, offset=None):
+    """Turn array of pd.Series into correctly shaped np.ndarray."""
+
+    df = pd.DataFrame(ts[0])
+    df = df.join(
+        ts[1:], how="outer"
+    )  # use how='outer' to not drop rows with missing values
+
+    # Deal with missing values explicitly
+    # TODO decide which method to use!
+    # df.fillna(value=FILLNA, inplace=True)
+    df.interpolate(method="linear", inplace=True)  # XXX interpolation!
+
+    # Ensure that seconds relative to offset are used as index
+    if is_relative == False:
+        df["time_rel"] = df.index
+        df["time_rel"] = df["time_rel"].apply(lambda x: float((x - offset) / 1000))
+        df.set_index("time_rel", inplace=True)
+
+    df.index.rename("time", inplace=True)
+
+    # Transform into np.ndarray with correct dtypes
+    ndarray = np.array(df.to_records())
+
+    return ndarray
@@ -0,0 +1,353 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Measure the throughput of a worker instance under synthetic load.
+
+Run `python -m benchmarks.load` from the root of the repository. The
+worker is started with message broker and result backend on the local
+filesystem, so neither RabbitMQ nor Redis is needed; the models in
+`tests/data` are served by a local HTTP server.
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from kombu.exceptions import DecodeError
+
+from benchmarks import compare, test_data_base_path
+from benchmarks.stages import TEMPLATE, find_models, known_start_values, make_task_rep
+
+CONCURRENCY = (1, 2, 4)
+MIX = "simulate=9,get_modelinfo=1"
+TASKS = 100
+TIMEOUT = 600
+
+# Simulated time span and output interval in seconds
+HORIZON = 86400
+OUTPUT_INTERVAL = 900
+
+
+def configure_environment(directory):
+    """Use broker, backend and tmpfs in `directory` unless set otherwise."""
+
+    directory = os.path.abspath(directory)
+    paths = {x: os.path.join(directory, x) for x in ["broker", "results", "tmpfs"]}
+    for path in paths.values():
+        os.makedirs(path, exist_ok=True)
+
+    os.environ["SIMWORKER_LOAD_BROKER_PATH"] = paths["broker"]
+    os.environ["SIMWORKER_BROKER_HREF"] = "filesystem://"
+    os.environ["SIMWORKER_BACKEND_HREF"] = f"file://{paths['results']}"
+    os.environ.setdefault("SIMWORKER_TMPFS_PATH", paths["tmpfs"])
+    os.environ.setdefault("SIMWORKER_TMPFS_MAXSIZE", str(10**9))
+    os.environ.setdefault("SIMWORKER_LOG_LEVEL", "WARNING")
+
+
+def get_app():
+    """Get the Celery-application, configured for the filesystem broker."""
+
+    from worker.celery import app
+
+    folder = os.environ["SIMWORKER_LOAD_BROKER_PATH"]
+    app.conf.broker_transport_options = {
+        "data_folder_in": folder,
+        "data_folder_out": folder,
+        "control_folder": folder,
+        "polling_interval": 0.01,
+    }
+    # Broadcasting isn't supported by the filesystem broker
+    app.conf.worker_enable_remote_control = False
+
+    return app
+
+
+def run_worker(concurrency):
+    """Run worker instance in this process (started by `start_worker`)."""
+
+    app = get_app()
+    with known_start_values():
+        app.worker_main(
+            [
+                "worker",
+                f"--concurrency={concurrency}",
+                "--pool=prefork",
+                "--loglevel=WARNING",
+                "--without-heartbeat",
+                "--without-gossip",
+                "--without-mingle",
+            ]
+        )
+
+
+def start_worker(concurrency, verbose=False):
+    output = None if verbose is True else subprocess.DEVNULL
+    return subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.load", f"--worker={concurrency}"],
+        stdout=output,
+        stderr=output,
+    )
+
+
+def stop_worker(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def read_memory(pid):
+    """Return current and peak resident set size of a process in bytes."""
+
+    memory = {}
+    with open(f"/proc/{pid}/status", encoding="utf8") as fp:
+        for line in fp:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                memory[key] = int(value.split()[0]) * 1024
+
+    return {"rss": memory.get("VmRSS"), "peakRss": memory.get("VmHWM")}
+
+
+def get_children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children", encoding="utf8") as fp:
+        return [int(x) for x in fp.read().split()]
+
+
+def serve_models():
+    """Serve `tests/data` via HTTP from a background thread."""
+
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    handler = functools.partial(Handler, directory=test_data_base_path)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    return httpd
+
+
+def parse_mix(mix):
+    """Turn e.g. `simulate=9,get_modelinfo=1` into weights by task."""
+
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ("simulate", "get_modelinfo"):
+            raise ValueError(f"Unknown task {name!r}")
+        weights[name] = float(weight or 1)
+
+    return weights
+
+
+def make_simulate_rep(base_url, model_id, fmu_filepath, seed):
+    """Simulation job with distinct inputs <- not answered from cache."""
+
+    task_rep = make_task_rep(fmu_filepath, HORIZON, OUTPUT_INTERVAL, seed=seed)
+    task_rep["requestId"] = str(uuid.uuid4())
+    task_rep["modelHref"] = f"{base_url}/{model_id}/model_instance.fmu"
+    task_rep["resultFormats"] = ["json"]
+
+    return task_rep
+
+
+def make_modelinfo_rep(model_id, fmu_filepath):
+    with zipfile.ZipFile(fmu_filepath) as fmu:
+        model_description = fmu.read("modelDescription.xml").decode("utf8")
+
+    return {
+        "modelDescription": model_description,
+        "templates": {"parameter": TEMPLATE, "io": TEMPLATE},
+        "records": [],
+        "iri_prefix": f"http://localhost/models/{model_id}#",
+    }
+
+
+def make_warmup_jobs(base_url, seed):
+    """Simulate each model once <- downloads it before measuring."""
+
+    return [
+        ("simulate", make_simulate_rep(base_url, model_id, fmu_filepath, seed + i))
+        for i, (model_id, fmu_filepath) in enumerate(find_models())
+    ]
+
+
+def make_jobs(n, weights, base_url, seed=0):
+    """Draw `n` pairs of task name and representation."""
+
+    rng = random.Random(seed)
+    models = find_models()
+    names = rng.choices(list(weights), weights=list(weights.values()), k=n)
+
+    jobs = []
+    for i, name in enumerate(names):
+        model_id, fmu_filepath = rng.choice(models)
+        if name == "simulate":
+            task_rep = make_simulate_rep(base_url, model_id, fmu_filepath, seed=i)
+        else:
+            task_rep = make_modelinfo_rep(model_id, fmu_filepath)
+        jobs.append((name, task_rep))
+
+    return jobs
+
+
+def is_ready(result):
+    try:
+        return result.ready()
+    except DecodeError:
+        return False  # result is being written by the worker
+
+
+def wait_for(results, timeout=TIMEOUT):
+    """Wait until all results are ready, return when each became ready."""
+
+    ready_at = [None] * len(results)
+    deadline = time.monotonic() + timeout
+    while None in ready_at:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Tasks not done within {timeout} s")
+        for i, result in enumerate(results):
+            if ready_at[i] is None and is_ready(result):
+                ready_at[i] = datetime.datetime.now(datetime.timezone.utc)
+        time.sleep(0.01)
+
+    return ready_at
+
+
+def get_latency(result, submitted_at, ready_at):
+    done_at = result.date_done or ready_at
+    if done_at.tzinfo is None:
+        done_at = done_at.replace(tzinfo=datetime.timezone.utc)
+
+    return (done_at - submitted_at).total_seconds()
+
+
+def submit(app, name, task_rep):
+    return app.send_task(f"worker.tasks.{name}", args=[task_rep])
+
+
+def run(concurrency, jobs, warmup_jobs=(), rate=None, verbose=False):
+    """Submit jobs to a worker instance with `concurrency` processes."""
+
+    app = get_app()
+    process = start_worker(concurrency, verbose)
+    try:
+        # Wait until the worker is up and has downloaded the models
+        wait_for([submit(app, *x) for x in warmup_jobs])
+
+        submitted_at = []
+        results = []
+        t0 = time.monotonic()
+        for i, (name, task_rep) in enumerate(jobs):
+            if rate is not None:
+                time.sleep(max(0, t0 + i / rate - time.monotonic()))
+            submitted_at.append(datetime.datetime.now(datetime.timezone.utc))
+            results.append(submit(app, name, task_rep))
+        ready_at = wait_for(results)
+        duration = time.monotonic() - t0
+
+        memory = [read_memory(x) for x in get_children(process.pid)]
+    finally:
+        stop_worker(process)
+
+    latencies = [
+        get_latency(*x)
+        for x in zip(results, submitted_at, ready_at)
+        if x[0].successful()
+    ]
+    failed = sum(1 for x in results if not x.successful())
+    percentiles = {}
+    if latencies:
+        percentiles = {
+            f"p{q}": float(np.percentile(latencies, q)) for q in (50, 90, 99)
+        }
+        percentiles["max"] = max(latencies)
+
+    return {
+        "benchmark": "load",
+        "concurrency": concurrency,
+        "tasks": len(jobs),
+        "failed": failed,
+        "duration": duration,
+        "throughput": len(jobs) / duration,
+        "throughputPerProcess": len(jobs) / duration / concurrency,
+        "latency": percentiles,
+        "rssMax": max((x["rss"] for x in memory), default=None),
+        "peakRssMax": max((x["peakRss"] for x in memory), default=None),
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load")
+    parser.add_argument(
+        "--concurrency",
+        default=",".join(str(x) for x in CONCURRENCY),
+        help="comma-separated numbers of worker processes to measure",
+    )
+    parser.add_argument("--tasks", type=int, default=TASKS, help="tasks per run")
+    parser.add_argument(
+        "--mix", default=MIX, help=f"weights of the tasks to submit (default: {MIX})"
+    )
+    parser.add_argument(
+        "--rate", type=float, help="tasks submitted per second (default: all at once)"
+    )
+    parser.add_argument("--directory", help="for broker, results and tmpfs")
+    parser.add_argument("--output", help="store the report as JSON in this file")
+    parser.add_argument(
+        "--verbose", action="store_true", help="show the output of the worker"
+    )
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.worker is not None:
+        return run_worker(args.worker)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        configure_environment(args.directory or tmp_dir)
+
+        httpd = serve_models()
+        base_url = f"http://127.0.0.1:{httpd.server_port}"
+        jobs = make_jobs(args.tasks, parse_mix(args.mix), base_url)
+        warmup_jobs = make_warmup_jobs(base_url, seed=args.tasks)
+
+        report = []
+        for concurrency in [int(x) for x in args.concurrency.split(",")]:
+            entry = run(concurrency, jobs, warmup_jobs, args.rate, args.verbose)
+            print(json.dumps({"mix": args.mix, **entry}))
+            report.append({"mix": args.mix, **entry})
+
+        httpd.shutdown()
+
+    if args.output is not None:
+        compare.save_report(report, args.output)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Compare the preparation of input time series against its predecessor."""
+
+import numpy as np
+
+import worker
+from benchmarks import legacy, measure
+
+START_TIME = 1542412800000
+
+
+def make_input_timeseries(n, seed=0):
+    """
+    Provide three shuffled timeseries objects with about `n` points.
+
+    The first series defines values at every point in time, the others
+    only at every second/third one so that merging requires interpolation.
+    Since the first series covers the union of all time axes, the legacy
+    implementation yields a sorted time axis as well.
+    """
+
+    rng = np.random.default_rng(seed)
+    step = 1000
+    length = n * 6 // 11
+
+    ts_dicts = []
+    for i, (label, unit) in enumerate(
+        [
+            ("temperature", "K"),
+            ("directHorizontalIrradiance", "W/m.2"),
+            ("diffuseHorizontalIrradiance", "W/m.2"),
+        ]
+    ):
+        timestamps = START_TIME + np.arange(0, length, i + 1) * step
+        values = rng.uniform(0, 1000, len(timestamps))
+        objects = [
+            {"timestamp": int(t), "value": float(v)} for t, v in zip(timestamps, values)
+        ]
+        rng.shuffle(objects)
+        ts_dicts.append({"label": label, "unit": unit, "timeseries": objects})
+
+    return ts_dicts
+
+
+def prepare_legacy(ts_dicts, is_relative, offset):
+    series = [legacy.timeseries_dict_to_pd_series(x) for x in ts_dicts]
+    return legacy.prepare_bc_for_fmpy(series, is_relative, offset)
+
+
+def assert_fmpy_input_equal(actual, desired):
+    """Compare structured arrays field by field."""
+
+    assert actual.dtype.names == desired.dtype.names
+    for name in desired.dtype.names:
+        np.testing.assert_allclose(
+            actual[name].astype(np.double), desired[name].astype(np.double)
+        )
+
+
+def run(sizes=(10**4, 10**5, 10**6)):
+    """Prepare inputs of increasing size with both implementations."""
+
+    report = []
+    for n in sizes:
+        ts_dicts = make_input_timeseries(n)
+
+        desired, t_legacy = measure(
+            prepare_legacy, ts_dicts, False, START_TIME, repeat=1
+        )
+        actual, t_current = measure(
+            worker.prepare_input_for_fmpy, ts_dicts, False, START_TIME
+        )
+        assert_fmpy_input_equal(actual, desired)
+
+        report.append(
+            {
+                "benchmark": "prepare_input_for_fmpy",
+                "points": n,
+                "legacy": t_legacy,
+                "current": t_current,
+                "speedup": t_legacy / t_current,
+            }
+        )
+
+    return report
@@ -0,0 +1,158 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Compare the result serializers against their previous implementation."""
+
+import itertools
+import json
+import math
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import rdflib
+from rdflib.compare import isomorphic
+
+import worker
+from benchmarks import legacy, measure, pv_fmu_filepath
+
+START_TIME = 1542412800000
+
+
+def make_result_df(duration, output_interval, time_is_relative=False):
+    """Provide a simulation result of the PV model with synthetic values."""
+
+    time = np.arange(0, duration + output_interval, output_interval, dtype=float)
+    df = pd.DataFrame(
+        data={
+            "powerDC": 5000 * np.sin(np.pi * time / duration) ** 2,
+            "totalEnergyDC": np.linspace(0, 42.0, len(time)),
+        }
+    )
+
+    if time_is_relative is True:
+        df.set_index(pd.Index(time, dtype="float"), inplace=True)
+    else:
+        df.set_index(
+            pd.DatetimeIndex((START_TIME + time * 1000) * 10**6).tz_localize("utc"),
+            inplace=True,
+        )
+    df.index.name = "time"
+
+    return df
+
+
+def assert_repr_json_equal(actual, desired):
+    """Compare JSON-representations; values only up to 10 digits."""
+
+    assert len(actual) == len(desired)
+    for a, d in zip(actual, desired):
+        assert a["label"] == d["label"]
+        assert a["unit"] == d["unit"]
+        assert len(a["timeseries"]) == len(d["timeseries"])
+        for x, y in zip(a["timeseries"], d["timeseries"]):
+            assert list(x.keys()) == list(y.keys())
+            assert x["timestamp"] == y["timestamp"]
+            assert x.get("datetime") == y.get("datetime")
+            assert math.isclose(x["value"], y["value"], rel_tol=1e-9, abs_tol=1e-9)
+
+
+def jsonld_to_graph(data):
+    """Parse JSON-LD-representation into rdflib.Graph."""
+
+    return rdflib.Graph().parse(data=json.dumps(data), format="json-ld")
+
+
+def deterministic_ids():
+    """Patch both JSON-LD-serializers to use the same sequence of IDs."""
+
+    counter = itertools.count()
+
+    def generate(size=8):
+        return f"{next(counter):0{size}d}"
+
+    def generate_ids(n, size=8):
+        return [generate(size) for _ in range(n)]
+
+    patches = [
+        mock.patch("nanoid.generate", generate),
+        mock.patch("worker.worker.generate_ids", generate_ids),
+    ]
+
+    return patches, counter
+
+
+def assert_repr_jsonld_isomorphic(df, time_is_relative):
+    """Check that both implementations produce the same graph."""
+
+    patches, _ = deterministic_ids()
+    with patches[0]:
+        desired = legacy.df_to_repr_jsonld(df, pv_fmu_filepath, time_is_relative)
+
+    patches, _ = deterministic_ids()
+    with patches[1]:
+        actual = worker.df_to_repr_jsonld(df, pv_fmu_filepath, time_is_relative)
+
+    assert isomorphic(jsonld_to_graph(actual), jsonld_to_graph(desired))
+
+
+def run_jsonld(duration=3600, output_interval=1):
+    """Serialize one hour at 1 s output interval with both implementations."""
+
+    report = []
+    for time_is_relative in [False, True]:
+        df = make_result_df(duration, output_interval, time_is_relative)
+        assert_repr_jsonld_isomorphic(df.iloc[:100], time_is_relative)
+
+        _, t_legacy = measure(
+            legacy.df_to_repr_jsonld, df, pv_fmu_filepath, time_is_relative, repeat=1
+        )
+        _, t_current = measure(
+            worker.df_to_repr_jsonld, df, pv_fmu_filepath, time_is_relative
+        )
+
+        report.append(
+            {
+                "benchmark": "df_to_repr_jsonld",
+                "rows": len(df),
+                "timeIsRelative": time_is_relative,
+                "legacy": t_legacy,
+                "current": t_current,
+                "speedup": t_legacy / t_current,
+            }
+        )
+
+    return report
+
+
+def run(duration=86400, output_interval=1):
+    """Serialize one day at 1 s output interval with both implementations."""
+
+    report = []
+    for time_is_relative in [False, True]:
+        df = make_result_df(duration, output_interval, time_is_relative)
+
+        desired, t_legacy = measure(
+            legacy.df_to_repr_json, df, pv_fmu_filepath, time_is_relative, repeat=1
+        )
+        actual, t_current = measure(
+            worker.df_to_repr_json, df, pv_fmu_filepath, time_is_relative
+        )
+        assert_repr_json_equal(actual, desired)
+
+        report.append(
+            {
+                "benchmark": "df_to_repr_json",
+                "rows": len(df),
+                "timeIsRelative": time_is_relative,
+                "legacy": t_legacy,
+                "current": t_current,
+                "speedup": t_legacy / t_current,
+            }
+        )
+
+    return report
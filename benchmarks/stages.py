@@ -0,0 +1,210 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Measure each stage of a simulation job for the bundled models."""
+
+import glob
+import os
+from contextlib import contextmanager
+from unittest import mock
+
+import fmpy
+import numpy as np
+
+import worker
+from benchmarks import measure, test_data_base_path
+from worker.model_description import model_description_cache
+
+START_TIME = 1542412800000
+
+# Simulated time spans and output intervals in seconds
+HORIZONS = (86400, 7 * 86400)
+OUTPUT_INTERVALS = (900, 60)
+
+# Minimal templates for deriving the JSON-schemata of a model
+TEMPLATE = (
+    '{"required": {{ required | tojson }}, "properties": { '
+    "{% for x in data %}"
+    '"{{ x.name }}": {"unit": "{{ x.unit }}"}{{ "," if not loop.last }}'
+    "{% endfor %} }}"
+)
+
+
+def find_models():
+    """Return the IDs and paths of all bundled models."""
+
+    filepaths = glob.glob(os.path.join(test_data_base_path, "*", "model_instance.fmu"))
+
+    return [(os.path.basename(os.path.dirname(x)), x) for x in sorted(filepaths)]
+
+
+def make_task_rep(fmu_filepath, horizon, output_interval, seed=0):
+    """
+    Provide a simulation job with synthetic inputs for the model.
+
+    Models that have an `epochOffset` parameter are simulated in absolute
+    time, all others in relative time. Inputs are given at every output
+    interval.
+    """
+
+    desc = worker.read_model_description(fmu_filepath)
+    time_is_relative = "epochOffset" not in desc.variables
+
+    rng = np.random.default_rng(seed)
+    start_time = 0 if time_is_relative else START_TIME
+    scale = 1 if time_is_relative else 1000
+    timestamps = np.arange(0, horizon + output_interval, output_interval) * scale
+
+    input_timeseries = []
+    for variable in desc.variables.by_causality("input"):
+        values = rng.uniform(0, 1000, len(timestamps))
+        input_timeseries.append(
+            {
+                "label": variable.name,
+                "unit": variable.unit or "1",
+                "timeseries": [
+                    {"timestamp": int(start_time + t), "value": float(v)}
+                    for t, v in zip(timestamps, values)
+                ],
+            }
+        )
+
+    return {
+        "requestId": None,
+        "parameterSet": {},
+        "simulationParameters": {
+            "startTime": start_time,
+            "stopTime": start_time + horizon * scale,
+            "outputInterval": output_interval,
+            "inputTimeIsRelative": time_is_relative,
+        },
+        "inputTimeseries": input_timeseries,
+    }
+
+
+@contextmanager
+def known_start_values():
+    """
+    Only pass start values to FMPy that the model defines.
+
+    The bundled models predate the parameter set file `fileName` that
+    the worker passes to all models.
+    """
+
+    simulate_fmu = fmpy.simulate_fmu
+
+    def simulate(filename, model_description=None, start_values={}, **kwargs):
+        if model_description is None:
+            model_description = fmpy.read_model_description(filename)
+        names = {x.name for x in model_description.modelVariables}
+        start_values = {k: v for k, v in start_values.items() if k in names}
+        return simulate_fmu(
+            filename,
+            model_description=model_description,
+            start_values=start_values,
+            **kwargs,
+        )
+
+    with mock.patch("worker.worker.fmpy.simulate_fmu", simulate):
+        yield
+
+
+def parse_cold(fmu_filepath):
+    model_description_cache.clear()
+    return worker.parse_model_description(fmu_filepath, TEMPLATE, TEMPLATE, [])
+
+
+def run_scenario(model_id, fmu_filepath, horizon, output_interval, pool, tmp_dir):
+    """Measure the stages of one simulation job."""
+
+    task_rep = make_task_rep(fmu_filepath, horizon, output_interval)
+    parameters = task_rep["simulationParameters"]
+    time_is_relative = parameters["inputTimeIsRelative"]
+    offset = None if time_is_relative else parameters["startTime"]
+    ts_dicts = task_rep["inputTimeseries"]
+    parameter_set_path = worker.write_parameter_set({}, tmp_dir)
+
+    durations = {}
+    _, durations["timeseries_dict_to_pd_series"] = measure(
+        lambda: [worker.timeseries_dict_to_pd_series(x) for x in ts_dicts]
+    )
+    series = [worker.timeseries_dict_to_pd_series(x) for x in ts_dicts]
+    _, durations["prepare_bc_for_fmpy"] = measure(
+        worker.prepare_bc_for_fmpy, series, time_is_relative, offset
+    )
+    _, durations["prepare_input_for_fmpy"] = measure(
+        worker.prepare_input_for_fmpy, ts_dicts, time_is_relative, offset
+    )
+    with known_start_values():
+        df, durations["simulate_fmu2_cs"] = measure(
+            worker.simulate_fmu2_cs, fmu_filepath, parameter_set_path, task_rep
+        )
+        _, durations["simulate_fmu2_cs:pooled"] = measure(
+            worker.simulate_fmu2_cs,
+            fmu_filepath,
+            parameter_set_path,
+            task_rep,
+            pool=pool,
+        )
+    _, durations["df_to_repr_json"] = measure(
+        worker.df_to_repr_json, df, fmu_filepath, time_is_relative
+    )
+    try:
+        _, durations["df_to_repr_jsonld"] = measure(
+            worker.df_to_repr_jsonld, df, fmu_filepath, time_is_relative, repeat=1
+        )
+    except KeyError:
+        pass  # units of the model can't be mapped to QUDT yet, see Roadmap
+    os.remove(parameter_set_path)
+
+    return [
+        {
+            "benchmark": stage,
+            "model": model_id,
+            "horizon": horizon,
+            "outputInterval": output_interval,
+            "rows": len(df),
+            "current": duration,
+        }
+        for stage, duration in durations.items()
+    ]
+
+
+def run(horizons=HORIZONS, output_intervals=OUTPUT_INTERVALS):
+    """Measure all stages for each bundled model and scenario."""
+
+    tmp_dir = os.environ["SIMWORKER_TMPFS_PATH"]
+    pool = worker.FMUPool(tmp_dir, maxsize=10**9, ttl=3600)
+
+    report = []
+    try:
+        for model_id, fmu_filepath in find_models():
+            _, t_parse = measure(parse_cold, fmu_filepath)
+            report.append(
+                {
+                    "benchmark": "parse_model_description",
+                    "model": model_id,
+                    "current": t_parse,
+                }
+            )
+
+            for horizon in horizons:
+                for output_interval in output_intervals:
+                    report.extend(
+                        run_scenario(
+                            model_id,
+                            fmu_filepath,
+                            horizon,
+                            output_interval,
+                            pool,
+                            tmp_dir,
+                        )
+                    )
+    finally:
+        pool.clear()
+
+    return report
@@ -0,0 +1,187 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for batches of simulation jobs."""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from benchmarks.stages import known_start_values
+from tests.conftest import test_data_base_path
+from worker import (
+    get_executor,
+    merge_variant,
+    run_variant,
+    run_variants,
+    run_variants_in_parallel,
+    shutdown_executor,
+)
+from worker.batch import init_process, simulate_variant
+
+FMU_FILEPATH = os.path.join(test_data_base_path, "fmpy_issue89", "model_instance.fmu")
+
+BATCH_REP = {
+    "modelHref": "http://localhost/models/a",
+    "simulationParameters": {"startTime": 0, "stopTime": 3600, "outputInterval": 60},
+    "parameterSet": {"p": {"value": 1, "unit": "1"}},
+    "variants": [{}],
+}
+
+
+class TestVariants(object):
+    # Variants MUST replace properties, but only update simulation parameters
+    def test_merge_variant(self):
+        variant = {
+            "parameterSet": {"q": {"value": 2, "unit": "1"}},
+            "simulationParameters": {"stopTime": 7200},
+        }
+
+        task_rep = merge_variant(BATCH_REP, variant)
+
+        assert "variants" not in task_rep
+        assert task_rep["modelHref"] == BATCH_REP["modelHref"]
+        assert task_rep["parameterSet"] == variant["parameterSet"]
+        assert task_rep["simulationParameters"] == {
+            "startTime": 0,
+            "stopTime": 7200,
+            "outputInterval": 60,
+        }
+        assert BATCH_REP["simulationParameters"]["stopTime"] == 3600
+
+    # A failing variant MUST be reported instead of raising
+    def test_run_variant_isolates_errors(self):
+        def func(task_rep, divisor):
+            return task_rep["simulationParameters"]["stopTime"] / divisor
+
+        task_rep = merge_variant(BATCH_REP, {})
+
+        assert run_variant(func, 0, task_rep, 2) == {
+            "index": 0,
+            "status": "success",
+            "result": 1800,
+        }
+
+        failure = run_variant(func, 1, task_rep, 0)
+        assert failure["status"] == "error"
+        assert failure["error"]["type"] == "ZeroDivisionError"
+
+
+PARALLEL_BATCH_REP = {
+    "requestId": None,
+    "simulationParameters": {
+        "startTime": 0,
+        "stopTime": 3,
+        "outputInterval": 1,
+        "inputTimeIsRelative": True,
+    },
+    "inputTimeseries": [],
+}
+PARAMETERS = {"parameterSet": {}}
+
+
+def run_in_daemon(queue, directory):
+    init_process(directory, 10**9, 3600, 10**9)
+    task_reps = [merge_variant(PARALLEL_BATCH_REP, PARAMETERS)] * 2
+    with known_start_values():
+        queue.put(
+            run_variants(
+                simulate_variant,
+                task_reps,
+                FMU_FILEPATH,
+                ["columnar"],
+                processes=2,
+                initargs=(directory, 10**9, 3600, 10**9),
+            )
+        )
+
+
+# Patch of FMPy applied in processes started by `ProcessPoolExecutor`
+patch = None
+
+
+def init_process_with_known_start_values(*initargs):
+    global patch
+
+    init_process(*initargs)
+    patch = known_start_values()
+    patch.__enter__()  # for the lifetime of the process
+
+
+@pytest.fixture
+def executor(tmp_path):
+    yield get_executor(2, str(tmp_path), 10**9, 3600, 10**9)
+    shutdown_executor()
+
+
+class TestParallelVariants(object):
+    # Variants MUST be reported in order, each with its own outcome
+    def test_results_are_isolated(self, executor):
+        task_reps = [merge_variant(PARALLEL_BATCH_REP, x) for x in [{}, PARAMETERS]]
+
+        results = run_variants_in_parallel(
+            executor, task_reps, FMU_FILEPATH, ["columnar"]
+        )
+
+        assert [x["index"] for x in results] == [0, 1]
+        assert results[0]["error"]["type"] == "KeyError"
+        assert "fileName" in results[1]["error"]["message"]
+
+    # Variants MUST be simulated in separate processes, results kept in order
+    def test_successful_variants(self, tmp_path):
+        stop_times = [3, 5, 4]
+        task_reps = [
+            merge_variant(
+                PARALLEL_BATCH_REP,
+                {"simulationParameters": {"stopTime": x}, **PARAMETERS},
+            )
+            for x in stop_times
+        ]
+        initargs = (str(tmp_path), 10**9, 3600, 10**9)
+
+        pool_executor = ProcessPoolExecutor(
+            max_workers=2,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_process_with_known_start_values,
+            initargs=initargs,
+        )
+        try:
+            results = run_variants_in_parallel(
+                pool_executor, task_reps, FMU_FILEPATH, ["columnar"]
+            )
+            pid = pool_executor.submit(os.getpid).result()
+        finally:
+            pool_executor.shutdown()
+
+        init_process(*initargs)
+        with known_start_values():
+            desired = [
+                run_variant(simulate_variant, i, x, FMU_FILEPATH, ["columnar"])
+                for i, x in enumerate(task_reps)
+            ]
+
+        assert [x["status"] for x in results] == ["success"] * 3
+        assert results == desired
+        assert [x["result"]["columnar"]["length"] for x in results] == [4, 6, 5]
+        assert pid != os.getpid()
+
+    # Daemonic processes MUST simulate the variants of a batch sequentially
+    def test_daemon_falls_back_to_sequential(self, tmp_path):
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        process = context.Process(
+            target=run_in_daemon, args=(queue, str(tmp_path)), daemon=True
+        )
+        process.start()
+        results = queue.get(timeout=60)
+        process.join()
+
+        assert [x["index"] for x in results] == [0, 1]
+        assert [x["status"] for x in results] == ["success", "success"]
+        assert results[0]["result"] == results[1]["result"]
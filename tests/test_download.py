@@ -0,0 +1,148 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for downloading files."""
+
+import base64
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tests.conftest import test_data_base_path
+from worker import DownloadError, download_file, fetch_file, get_session
+from worker.download import file_lock
+
+LAST_MODIFIED = "Wed, 01 Sep 2021 00:00:00 GMT"
+
+
+class Handler(BaseHTTPRequestHandler):
+    content = b""
+    digest = None
+    delay = 0
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(dict(self.headers))
+        time.sleep(self.delay)
+
+        if self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.content)))
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        if self.digest is not None:
+            self.send_header("Digest", f"sha-256={self.digest}")
+        self.end_headers()
+        self.wfile.write(self.content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    with open(
+        os.path.join(test_data_base_path, "fmpy_issue89", "model_instance.fmu"), "rb"
+    ) as fp:
+        content = fp.read()
+
+    Handler.content = content
+    Handler.digest = base64.b64encode(hashlib.sha256(content).digest()).decode()
+    Handler.delay = 0
+    Handler.requests = []
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/model.fmu"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestDownload(object):
+    # A verified download MUST be written to the target path and nowhere else
+    def test_download(self, server, tmp_path):
+        filepath = str(tmp_path / "model.fmu")
+
+        assert download_file(get_session(), server, filepath) is True
+        with open(filepath, "rb") as fp:
+            assert fp.read() == Handler.content
+        assert not [x for x in os.listdir(tmp_path) if x.startswith(".download-")]
+
+    # An unchanged resource MUST NOT be transferred again
+    def test_revalidation(self, server, tmp_path):
+        filepath = str(tmp_path / "model.fmu")
+        session = get_session()
+
+        download_file(session, server, filepath)
+        assert download_file(session, server, filepath, revalidate=True) is False
+        assert Handler.requests[-1]["If-Modified-Since"] == LAST_MODIFIED
+
+    # Corrupt content MUST be rejected without leaving a file behind
+    @pytest.mark.parametrize("corruption", ["digest", "zip"])
+    def test_corrupt_content_is_rejected(self, server, tmp_path, corruption):
+        filepath = str(tmp_path / "model.fmu")
+        if corruption == "digest":
+            Handler.digest = base64.b64encode(hashlib.sha256(b"").digest()).decode()
+        else:
+            Handler.content = b"not a zip archive"
+            Handler.digest = None
+
+        with pytest.raises(DownloadError):
+            download_file(get_session(), server, filepath)
+        assert os.listdir(tmp_path) == []
+
+    # Concurrent requests for the same file MUST result in one download only
+    def test_single_flight(self, server, tmp_path):
+        filepath = str(tmp_path / "model.fmu")
+        Handler.delay = 0.2
+
+        def fetch(_):
+            fetch_file(get_session(), server, filepath)
+            with open(filepath, "rb") as fp:
+                return fp.read()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            contents = list(executor.map(fetch, range(4)))
+
+        assert len(Handler.requests) == 1
+        assert all(x == Handler.content for x in contents)
+
+    # A waiter MUST NOT hold a lock on a lock file deleted meanwhile
+    def test_lock_file_deleted_while_waiting(self, tmp_path):
+        filepath = str(tmp_path / "model.fmu")
+        intervals = {}
+
+        def hold(name, duration):
+            with file_lock(filepath):
+                start = time.monotonic()
+                time.sleep(duration)
+                intervals[name] = (start, time.monotonic())
+
+        first = threading.Thread(target=hold, args=("first", 0.2))
+        first.start()
+        time.sleep(0.05)
+        waiting = threading.Thread(target=hold, args=("waiting", 0.01))
+        waiting.start()
+        time.sleep(0.05)
+
+        # Evicting the file deletes the lock file, too; a new locker follows
+        os.remove(f"{filepath}.lock")
+        other = threading.Thread(target=hold, args=("other", 0.3))
+        other.start()
+        for thread in [first, waiting, other]:
+            thread.join()
+
+        assert intervals["waiting"][0] >= intervals["other"][1]
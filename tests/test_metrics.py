@@ -0,0 +1,82 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for exposing metrics in the Prometheus text format."""
+
+import os
+import urllib.request
+
+import pytest
+
+from worker import Registry, start_http_server, write_textfile
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+class TestRegistry(object):
+    # Counters MUST be rendered per combination of labels
+    def test_counter(self, registry):
+        counter = registry.counter("tasks_total", "Tasks processed")
+        counter.inc(task="simulate", state="SUCCESS")
+        counter.inc(2, task="simulate", state="SUCCESS")
+
+        lines = registry.render().splitlines()
+        assert "# TYPE tasks_total counter" in lines
+        assert 'tasks_total{state="SUCCESS",task="simulate"} 3.0' in lines
+
+    # Histograms MUST count observations in cumulative buckets
+    def test_histogram(self, registry):
+        histogram = registry.histogram("duration_seconds", "Duration", buckets=[1, 2])
+        for value in [0.5, 1.5, 3]:
+            histogram.observe(value, stage="simulate")
+
+        lines = registry.render().splitlines()
+        assert 'duration_seconds_bucket{stage="simulate",le="1.0"} 1.0' in lines
+        assert 'duration_seconds_bucket{stage="simulate",le="2.0"} 2.0' in lines
+        assert 'duration_seconds_bucket{stage="simulate",le="+Inf"} 3.0' in lines
+        assert 'duration_seconds_sum{stage="simulate"} 5.0' in lines
+        assert 'duration_seconds_count{stage="simulate"} 3.0' in lines
+
+    # Metrics backed by a function MUST be evaluated when rendered
+    def test_function(self, registry):
+        entries = []
+        registry.gauge("entries", "Number of entries", function=lambda: len(entries))
+        entries.append("x")
+
+        assert "entries 1.0" in registry.render().splitlines()
+
+    def test_duplicate_name(self, registry):
+        registry.gauge("entries", "Number of entries")
+        with pytest.raises(ValueError):
+            registry.counter("entries", "Number of entries")
+
+
+def test_write_textfile(registry, tmp_path):
+    registry.gauge("entries", "Number of entries").set(2)
+    filepath = os.path.join(tmp_path, "worker.prom")
+
+    write_textfile(registry, filepath)
+
+    assert os.listdir(tmp_path) == ["worker.prom"]
+    with open(filepath, encoding="utf8") as fp:
+        assert fp.read() == registry.render()
+
+
+def test_http_server(registry):
+    registry.gauge("entries", "Number of entries").set(2)
+    httpd = start_http_server(registry, 0)
+    try:
+        assert httpd.server_address[0] == "127.0.0.1"
+        url = f"http://127.0.0.1:{httpd.server_port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.read().decode("utf8") == registry.render()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
@@ -0,0 +1,84 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for reading model descriptions."""
+
+import os
+import shutil
+
+from tests.conftest import test_data_base_path
+from worker import parse_model_description, read_model_description
+from worker.worker import compile_template
+
+fmu_filepath = os.path.join(
+    test_data_base_path, "c02f1f12-966d-4eab-9f21-dcf265ceac71", "model_instance.fmu"
+)
+
+
+class TestReadModelDescription(object):
+    # The model description MUST be parsed only once per file
+    def test_parsed_once(self):
+        first = read_model_description(fmu_filepath)
+        second = read_model_description(fmu_filepath)
+
+        assert first is second
+        assert first.variables["powerDC"].unit == "W"
+
+    # A modified file MUST be parsed again
+    def test_modified_file_is_parsed_again(self, tmp_path):
+        filepath = os.path.join(tmp_path, "model.fmu")
+        shutil.copyfile(fmu_filepath, filepath)
+        first = read_model_description(filepath)
+
+        stat = os.stat(filepath)
+        os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        second = read_model_description(filepath)
+
+        assert first is not second
+        assert first.guid == second.guid
+
+
+class TestModelVariableIndex(object):
+    # Lookups MUST yield the same variables as scanning all of them
+    def test_lookups_match_linear_scan(self):
+        desc = read_model_description(fmu_filepath)
+        variables = desc.model_description.modelVariables
+        prefixes = ["plantIrradianceNormal.", "integrator."]
+
+        assert desc.variables.by_causality("output") == [
+            x for x in variables if x.causality == "output"
+        ]
+        assert desc.variables.with_prefix(prefixes) == [
+            x for x in variables if any(x.name.startswith(p) for p in prefixes)
+        ]
+        for x in variables:
+            assert desc.variables[x.name] is x
+            assert x in desc.variables.by_value_reference(x.valueReference, x.type)
+
+
+class TestParseModelDescription(object):
+    template = (
+        '{"required": {{ required | tojson }}, '
+        '"names": [{% for x in data %}"{{ x.name }}"{{ "," if not loop.last }}'
+        "{% endfor %}]}"
+    )
+
+    # Templates MUST be rendered from their source
+    def test_render_from_source(self):
+        parsed = parse_model_description(
+            fmu_filepath, self.template, self.template, ["globalIrradiance."]
+        )
+
+        assert "powerDC" in parsed["schemata"]["output"]["names"]
+        assert parsed["schemata"]["parameter"]["names"]
+
+    # Identical template sources MUST only be compiled once
+    def test_template_compiled_once(self):
+        first = compile_template(self.template)
+        second = compile_template("".join(list(self.template)))
+
+        assert first is second
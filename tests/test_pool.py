@@ -0,0 +1,99 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for the pool of reusable FMU instances."""
+
+import os
+
+import fmpy
+import numpy as np
+import pytest
+
+from tests.conftest import test_data_base_path
+from worker import FMUPool, TmpfsIndex
+
+
+@pytest.fixture
+def fmu_filepath():
+    return os.path.join(test_data_base_path, "fmpy_issue89", "model_instance.fmu")
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = FMUPool(str(tmp_path), maxsize=10**9, ttl=3600)
+    yield pool
+    pool.clear()
+
+
+def simulate(fmu):
+    return fmpy.simulate_fmu(
+        fmu.unzipdir,
+        model_description=fmu.model_description,
+        fmu_instance=fmu.instance,
+        stop_time=3.5,
+        output_interval=0.5,
+        input=np.array(
+            [(0.0, 0.0), (6.0, 60.0)], dtype=[("time", np.double), ("u1", np.double)]
+        ),
+    )
+
+
+class TestFMUPool(object):
+    # Subsequent checkouts MUST reuse the instance and yield identical results
+    def test_instance_is_reused(self, pool, fmu_filepath):
+        with pool.checkout(fmu_filepath) as fmu:
+            instance = fmu.instance
+            first = simulate(fmu)
+
+        with pool.checkout(fmu_filepath) as fmu:
+            assert fmu.instance is instance
+            second = simulate(fmu)
+
+        assert np.array_equal(first, second)
+        assert len(pool) == 1
+
+    # A failing simulation MUST remove the instance from the pool
+    def test_failed_instance_is_discarded(self, pool, fmu_filepath):
+        with pytest.raises(RuntimeError):
+            with pool.checkout(fmu_filepath) as fmu:
+                unzipdir = fmu.unzipdir
+                raise RuntimeError()
+
+        assert len(pool) == 0
+        assert not os.path.isdir(unzipdir)
+
+    # Idle instances MUST be evicted
+    def test_idle_instance_is_evicted(self, pool, fmu_filepath):
+        pool.ttl = 0
+        with pool.checkout(fmu_filepath, key="a") as fmu:
+            unzipdir = fmu.unzipdir
+
+        pool.expire()
+
+        assert "a" not in pool
+        assert not os.path.isdir(unzipdir)
+
+    # Files of idle instances MUST count against the budget of the index
+    def test_idle_files_are_evicted_by_index(self, tmp_path, fmu_filepath):
+        index = TmpfsIndex(str(tmp_path), maxsize=10**9)
+        pool = FMUPool(str(tmp_path), maxsize=10**9, ttl=3600, index=index)
+        try:
+            with pool.checkout(fmu_filepath) as fmu:
+                unzipdir = fmu.unzipdir
+                index.maxsize = 0
+                assert index.evict() is False
+                assert os.path.isdir(unzipdir)
+
+            assert not os.path.isdir(unzipdir)
+            assert index.total_size() == 0
+
+            with pool.checkout(fmu_filepath) as fmu:
+                assert fmu.unzipdir != unzipdir
+                assert os.path.isdir(fmu.unzipdir)
+                simulate(fmu)
+        finally:
+            pool.clear()
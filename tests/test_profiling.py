@@ -0,0 +1,47 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for profiling tasks."""
+
+import os
+import pstats
+
+import pytest
+
+from worker import profile_filepath, profiled
+
+
+def work():
+    return sum(x * x for x in range(1000))
+
+
+# Tags from requests MUST NOT escape the directory
+def test_profile_filepath(tmp_path):
+    filepath = profile_filepath(str(tmp_path), "../req 1", "simulate")
+
+    assert os.path.dirname(filepath) == str(tmp_path)
+    assert os.path.basename(filepath) == ".._req_1-simulate.pstats"
+
+
+def test_profiled(tmp_path):
+    filepath = profile_filepath(str(tmp_path), "req", "simulate")
+    with profiled(filepath):
+        work()
+
+    assert os.listdir(tmp_path) == ["req-simulate.pstats"]
+    stats = pstats.Stats(filepath)
+    assert any(name == "work" for _, _, name in stats.stats)
+
+
+# Statistics MUST also be stored iff the task fails
+def test_profiled_failure(tmp_path):
+    filepath = profile_filepath(str(tmp_path), "req", "simulate")
+    with pytest.raises(ZeroDivisionError):
+        with profiled(filepath):
+            1 / 0
+
+    assert os.path.isfile(filepath)
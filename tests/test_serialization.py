@@ -0,0 +1,124 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for the representations of simulation results."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import legacy, pv_fmu_filepath
+from benchmarks.serialization import (
+    assert_repr_json_equal,
+    assert_repr_jsonld_isomorphic,
+    make_result_df,
+)
+from worker import (
+    Timings,
+    check_result_formats,
+    df_to_repr,
+    df_to_repr_columnar,
+    df_to_repr_json,
+    df_to_repr_jsonld,
+    repr_columnar_to_df,
+)
+
+
+@pytest.mark.parametrize("time_is_relative", [False, True])
+@pytest.mark.parametrize("output_interval", [900, 0.5])
+class TestReprJSON(object):
+    # The representation MUST match the one of the previous implementation
+    def test_parity(self, time_is_relative, output_interval):
+        df = make_result_df(3600, output_interval, time_is_relative)
+        df.iloc[3, 0] = np.nan
+
+        desired = legacy.df_to_repr_json(df, pv_fmu_filepath, time_is_relative)
+        actual = df_to_repr_json(df, pv_fmu_filepath, time_is_relative)
+
+        assert actual[0]["timeseries"][3]["value"] is None
+        actual[0]["timeseries"][3]["value"] = desired[0]["timeseries"][3]["value"] = 0
+        assert_repr_json_equal(actual, desired)
+
+
+@pytest.mark.parametrize("time_is_relative", [False, True])
+class TestReprJSONLD(object):
+    # The graph MUST be isomorphic to the one built using rdflib
+    def test_conformance(self, time_is_relative):
+        df = make_result_df(3600, 300, time_is_relative)
+
+        assert_repr_jsonld_isomorphic(df, time_is_relative)
+
+    # Each observation MUST have its own ID
+    def test_unique_ids(self, time_is_relative):
+        df = make_result_df(3600, 1, time_is_relative)
+
+        actual = df_to_repr_jsonld(df, pv_fmu_filepath, time_is_relative)
+        ids = [x["@id"] for x in actual]
+
+        assert len(ids) == 3 * df.size + len(df.columns)
+        assert len(set(ids)) == len(ids)
+
+
+class TestReprSelection(object):
+    # Only the requested representations MUST be rendered
+    def test_requested_formats_only(self):
+        df = make_result_df(3600, 900)
+
+        actual = df_to_repr(df, pv_fmu_filepath, False, ["json"])
+
+        assert list(actual.keys()) == ["json"]
+
+    # Both JSON and JSON-LD MUST be rendered by default
+    def test_default_formats(self):
+        df = make_result_df(3600, 900)
+
+        actual = df_to_repr(df, pv_fmu_filepath, False)
+
+        assert list(actual.keys()) == ["json", "ld+json"]
+
+    # Unknown representations MUST be rejected
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            check_result_formats(["json", "xml"])
+
+    # Rendering each representation MUST be timed separately
+    def test_timings(self):
+        df = make_result_df(3600, 900)
+        timings = Timings()
+
+        df_to_repr(df, pv_fmu_filepath, False, ["json", "columnar"], timings=timings)
+
+        assert list(timings.stages.keys()) == ["serialize:json", "serialize:columnar"]
+        assert all(x >= 0 for x in timings.stages.values())
+
+
+@pytest.mark.parametrize("time_is_relative", [False, True])
+@pytest.mark.parametrize("compression", [None, "zlib"])
+class TestReprColumnar(object):
+    # Decoding the representation MUST restore the DataFrame
+    def test_roundtrip(self, time_is_relative, compression):
+        df = make_result_df(3600, 0.5, time_is_relative)
+        df.iloc[3, 0] = np.nan
+
+        data = df_to_repr_columnar(df, pv_fmu_filepath, time_is_relative, compression)
+        actual = repr_columnar_to_df(data)
+
+        assert data["columns"][1]["unit"] == "kW.h"
+        pd.testing.assert_frame_equal(actual, df, check_freq=False)
+
+    # The representation MUST be much smaller than the JSON-representation
+    def test_size(self, time_is_relative, compression):
+        df = make_result_df(3600, 1, time_is_relative)
+
+        columnar = df_to_repr_columnar(
+            df, pv_fmu_filepath, time_is_relative, compression
+        )
+        verbose = df_to_repr_json(df, pv_fmu_filepath, time_is_relative)
+
+        assert len(json.dumps(columnar)) < len(json.dumps(verbose)) / 3
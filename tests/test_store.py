@@ -0,0 +1,77 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for storing results outside of the result backend."""
+
+import os
+
+import pytest
+
+from worker import FilesystemResultStore, offload_result, serialize_result
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FilesystemResultStore(str(tmp_path))
+
+
+RESULT = {"columnar": {"length": 3, "columns": [{"label": "y", "data": "AAAA"}]}}
+
+
+class TestResultStore(object):
+    # Small results MUST be returned inline
+    def test_small_result_is_inline(self, store, tmp_path):
+        assert offload_result(RESULT, store, threshold=10**6) == RESULT
+        assert os.listdir(tmp_path) == []
+
+    # Large results MUST be replaced by a reference that resolves to them
+    def test_large_result_is_stored(self, store):
+        offloaded = offload_result(RESULT, store, threshold=10, id="task")
+
+        reference = offloaded["reference"]
+        assert reference["id"] == "task"
+        assert reference["href"].startswith("file://")
+        assert store.get(reference) == RESULT
+
+        store.delete(reference)
+        assert not os.path.exists(store.filepath(reference))
+
+    # Results serialized already MUST be stored as given
+    def test_serialized_result_is_reused(self, store):
+        data = serialize_result(RESULT)
+        offloaded = offload_result(RESULT, store, threshold=10, data=data)
+
+        assert offloaded["reference"]["length"] == len(data)
+        assert store.get(offloaded["reference"]) == RESULT
+
+    # Expired results MUST be deleted when storing another one
+    def test_expired_result_is_deleted(self, tmp_path):
+        store = FilesystemResultStore(str(tmp_path), ttl=60)
+        old = store.put(serialize_result(RESULT), id="old")
+        os.utime(store.filepath(old), (0, 0))
+
+        new = store.put(serialize_result(RESULT), id="new")
+
+        assert not store.exists(old)
+        assert store.get(new) == RESULT
+
+    # The oldest results MUST be deleted while the maximum size is exceeded
+    def test_oldest_result_is_deleted(self, tmp_path):
+        store = FilesystemResultStore(str(tmp_path), maxsize=10**6)
+        data = serialize_result(RESULT)
+        references = [store.put(data, id=str(i)) for i in range(3)]
+        for i, reference in enumerate(references):
+            os.utime(store.filepath(reference), (i, i))
+
+        store.maxsize = 3 * references[0]["size"]
+        references.append(store.put(data, id="3"))
+
+        assert [store.exists(x) for x in references] == [False, True, True, True]
+
+    # Without a store, results MUST always be returned inline
+    def test_no_store(self):
+        assert offload_result(RESULT, None, threshold=0) == RESULT
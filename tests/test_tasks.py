@@ -0,0 +1,326 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for the caches and the warm-up of the Celery-tasks."""
+
+import functools
+import importlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from operator import itemgetter
+from unittest import mock
+
+import pytest
+from cachetools import TTLCache
+
+from benchmarks.load import serve_models
+from benchmarks.stages import TEMPLATE, known_start_values, make_task_rep
+from tests.conftest import test_data_base_path
+from worker import Timings
+from worker.model_description import model_description_cache
+from worker.store import FilesystemResultStore
+
+
+@pytest.fixture(scope="module")
+def tasks(tmp_path_factory):
+    pytest.importorskip("fmi2rdf")
+
+    directory = str(tmp_path_factory.mktemp("tmpfs"))
+    for key, value in [
+        ("SIMWORKER_BROKER_HREF", "memory://"),
+        ("SIMWORKER_BACKEND_HREF", "cache+memory://"),
+        ("SIMWORKER_TMPFS_PATH", directory),
+        ("SIMWORKER_TMPFS_MAXSIZE", str(10**9)),
+    ]:
+        os.environ.setdefault(key, value)
+
+    return importlib.import_module("worker.tasks")
+
+
+def serve_directory(directory):
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    handler = functools.partial(Handler, directory=directory)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    return httpd
+
+
+@pytest.fixture
+def base_url():
+    httpd = serve_models()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def bundled_fmu_filepath(model_id):
+    return os.path.join(test_data_base_path, model_id, "model_instance.fmu")
+
+
+def read_model_description(model_id):
+    fmu_filepath = os.path.join(test_data_base_path, model_id, "model_instance.fmu")
+    with zipfile.ZipFile(fmu_filepath) as fmu:
+        return fmu.read("modelDescription.xml").decode("utf8")
+
+
+def make_modelinfo_rep(model_description):
+    return {
+        "modelDescription": model_description,
+        "templates": {"parameter": TEMPLATE, "io": TEMPLATE},
+        "records": [],
+        "iri_prefix": "http://localhost/models/a#",
+    }
+
+
+class TestTmpFilepath(object):
+    # Identical content MUST be written once and be answered from the cache
+    def test_identical_content_is_cached(self, tasks):
+        content = f'<fmiModelDescription guid="{uuid.uuid4()}" />'
+
+        with mock.patch(
+            "worker.tasks.tempfile.mkstemp", wraps=tempfile.mkstemp
+        ) as mkstemp:
+            filepath = tasks.get_tmp_filepath(content, "xml")
+            assert tasks.get_tmp_filepath(content, "xml") == filepath
+        assert mkstemp.call_count == 1
+
+        with open(filepath, encoding="utf8") as fp:
+            assert fp.read() == content
+
+    # Changed content MUST be stored in a file of its own
+    def test_changed_content_is_stored(self, tasks):
+        filepath = tasks.get_tmp_filepath("<a />", "xml")
+        other = tasks.get_tmp_filepath("<b />", "xml")
+
+        assert other != filepath
+        for path, content in [(filepath, "<a />"), (other, "<b />")]:
+            with open(path, encoding="utf8") as fp:
+                assert fp.read() == content
+
+
+class TestFMUFilepath(object):
+    # Models whose URLs end in the same file name MUST NOT share a file
+    def test_models_are_distinct(self, tasks, base_url):
+        filepaths = []
+        for model_id in ["fmpy_issue89", "c02f1f12-966d-4eab-9f21-dcf265ceac71"]:
+            model_href = f"{base_url}/{model_id}/model_instance.fmu"
+            filepath = tasks.get_fmu_filepath(model_href)
+            source = os.path.join(test_data_base_path, model_id, "model_instance.fmu")
+            with open(filepath, "rb") as fp, open(source, "rb") as fp_source:
+                assert fp.read() == fp_source.read()
+            filepaths.append(filepath)
+
+        assert filepaths[0] != filepaths[1]
+
+    # Replaced models MUST be downloaded again iff revalidation is enabled
+    def test_cached_model_is_revalidated(self, tasks, tmp_path):
+        old, new = [
+            bundled_fmu_filepath(x)
+            for x in ["fmpy_issue89", "c02f1f12-966d-4eab-9f21-dcf265ceac71"]
+        ]
+        source = tmp_path / f"{uuid.uuid4()}.fmu"
+        shutil.copyfile(old, source)
+        httpd = serve_directory(str(tmp_path))
+        model_href = f"http://127.0.0.1:{httpd.server_port}/{source.name}"
+        try:
+            with mock.patch.object(tasks, "revalidate_fmus", True):
+                filepath = tasks.get_fmu_filepath(model_href)
+                shutil.copyfile(new, source)
+                os.utime(source, (time.time() + 10, time.time() + 10))
+
+                assert tasks.get_fmu_filepath(model_href) == filepath
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+        with open(filepath, "rb") as fp, open(new, "rb") as fp_new:
+            assert fp.read() == fp_new.read()
+
+
+class TestSimulation(object):
+    # Identical parameter sets MUST be reported as taken from the cache
+    def test_parameter_set_is_cached(self, tasks):
+        fmu_filepath = bundled_fmu_filepath("fmpy_issue89")
+        task_rep = make_task_rep(fmu_filepath, 60, 10)
+        task_rep["parameterSet"] = {
+            "p": {"value": uuid.uuid4().int % 10**9, "unit": "1"}
+        }
+
+        flags = []
+        with known_start_values():
+            for _ in range(2):
+                timings = Timings()
+                tasks.run_simulation(task_rep, fmu_filepath, ["json"], timings=timings)
+                flags.append(timings.cache["parameterSet"])
+
+        assert flags == [False, True]
+
+
+@pytest.fixture
+def result_store(tasks, tmp_path):
+    store = FilesystemResultStore(str(tmp_path), ttl=60)
+    cache = TTLCache(maxsize=10**9, ttl=60, getsizeof=itemgetter(1))
+
+    with mock.patch.object(tasks, "result_store", store), mock.patch.object(
+        tasks, "result_store_threshold", 0
+    ), mock.patch.object(tasks, "result_cache", cache), known_start_values():
+        yield store
+
+
+def run_job(tasks, seed=0):
+    fmu_filepath = bundled_fmu_filepath("fmpy_issue89")
+    task_rep = make_task_rep(fmu_filepath, 60, 10, seed=seed)
+    timings = Timings()
+    result = tasks.run_cached_simulation(
+        task_rep, fmu_filepath, ["json"], str(uuid.uuid4()), "simulate", timings
+    )
+
+    return result, timings.cache["result"]
+
+
+class TestResultStore(object):
+    # Results taken from the cache MUST NOT be stored again
+    def test_cached_result_is_not_stored(self, tasks, result_store):
+        first, _ = run_job(tasks)
+        second, cached = run_job(tasks)
+
+        assert cached is True
+        assert second == first
+        assert len(os.listdir(result_store.directory)) == 1
+
+    # Expired results MUST NOT be returned, but simulated again
+    def test_expired_result_is_not_returned(self, tasks, result_store):
+        first, _ = run_job(tasks)
+        past = time.time() - 2 * result_store.ttl
+        os.utime(result_store.filepath(first["reference"]), (past, past))
+        run_job(tasks, seed=1)
+
+        assert not result_store.exists(first["reference"])
+        second, cached = run_job(tasks)
+        assert cached is False
+        assert second != first
+        assert result_store.exists(second["reference"])
+
+
+class TestResultCache(object):
+    # Identical jobs MUST be answered from the cache without simulating
+    def test_identical_job_is_cached(self, tasks, result_store):
+        with mock.patch(
+            "worker.tasks.run_simulation", wraps=tasks.run_simulation
+        ) as run_simulation:
+            first, first_cached = run_job(tasks)
+            second, second_cached = run_job(tasks)
+
+        assert [first_cached, second_cached] == [False, True]
+        assert second == first
+        assert run_simulation.call_count == 1
+
+    # Entries MUST be evicted once the results exceed the size of the cache
+    def test_entries_are_evicted_by_size(self, tasks, result_store):
+        run_job(tasks)
+        ((key, entry),) = tasks.result_cache.items()
+        cache = TTLCache(maxsize=entry[1] * 3 // 2, ttl=60, getsizeof=itemgetter(1))
+        cache[key] = entry
+
+        with mock.patch.object(tasks, "result_cache", cache):
+            run_job(tasks, seed=1)
+            assert len(cache) == 1
+            assert key not in cache
+
+            _, cached = run_job(tasks)
+            assert cached is False
+
+
+class TestModelinfo(object):
+    # Model information MUST be derived once per model description
+    def test_modelinfo_is_cached(self, tasks):
+        task_rep = make_modelinfo_rep(read_model_description("fmpy_issue89"))
+        tasks.modelinfo_cache.clear()
+
+        with mock.patch(
+            "worker.tasks.parse_model_description",
+            wraps=tasks.parse_model_description,
+        ) as parse:
+            first = tasks.get_modelinfo(task_rep)
+            second = tasks.get_modelinfo(dict(task_rep))
+
+        assert first == second
+        assert parse.call_count == 1
+
+    # Model information MUST be derived again iff the model changes
+    def test_changed_model_is_parsed(self, tasks):
+        model_description = read_model_description("fmpy_issue89")
+        changed = model_description.replace('guid="', 'guid="changed-', 1)
+        tasks.modelinfo_cache.clear()
+
+        with mock.patch(
+            "worker.tasks.parse_model_description",
+            wraps=tasks.parse_model_description,
+        ) as parse:
+            tasks.get_modelinfo(make_modelinfo_rep(model_description))
+            tasks.get_modelinfo(make_modelinfo_rep(changed))
+
+        assert parse.call_count == 2
+        assert parse.call_args_list[0][0][0] != parse.call_args_list[1][0][0]
+
+    # The model description MUST NOT be evicted while it is parsed
+    def test_model_description_is_acquired(self, tasks):
+        task_rep = make_modelinfo_rep(read_model_description("fmpy_issue89"))
+        tasks.modelinfo_cache.clear()
+
+        def parse(filepath, *args):
+            with mock.patch.object(tasks.tmpfs_index, "maxsize", 0):
+                assert tasks.tmpfs_index.evict() is False
+            assert os.path.isfile(filepath)
+            return {}
+
+        with mock.patch("worker.tasks.parse_model_description", parse):
+            tasks.get_modelinfo(task_rep)
+
+
+class TestWarmup(object):
+    # Warm-up MUST parse the models and fill the pool of each process
+    def test_models_are_warmed_up(self, tasks, base_url):
+        model_href = f"{base_url}/fmpy_issue89/model_instance.fmu"
+        model_description_cache.clear()
+        tasks.fmu_pool.clear()
+
+        with mock.patch.object(tasks, "warmup_models", [model_href]):
+            tasks.fetch_warmup_models()
+            assert len(model_description_cache) == 1
+
+            tasks.instantiate_warmup_models()
+
+        try:
+            assert model_href in tasks.fmu_pool
+            assert tasks.fmu_pool[model_href].in_use is False
+        finally:
+            tasks.fmu_pool.clear()
+
+
+class TestProfiling(object):
+    # Tasks MUST be profiled also iff their representation is passed by name
+    def test_keyword_arguments(self, tasks, tmp_path):
+        task_rep = make_modelinfo_rep(read_model_description("fmpy_issue89"))
+        task_rep.update(profile=True, requestId="keyword")
+        tasks.modelinfo_cache.clear()
+
+        with mock.patch.object(tasks, "profile_dir", str(tmp_path)):
+            result = tasks.get_modelinfo(task_rep=task_rep)
+
+        assert result == tasks.get_modelinfo(task_rep)
+        assert os.listdir(tmp_path) == ["keyword-get_modelinfo.pstats"]
@@ -0,0 +1,117 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+"""Run unit tests for the shared index of files on tmpfs."""
+
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+from worker import TmpfsIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    return TmpfsIndex(str(tmp_path), maxsize=250)
+
+
+def create_file(directory, name, size=100):
+    filepath = os.path.join(directory, name)
+    with open(filepath, "wb") as fp:
+        fp.write(b"\0" * size)
+
+    return filepath
+
+
+def acquire_and_exit(filepath, maxsize):
+    TmpfsIndex(os.path.dirname(filepath), maxsize=maxsize).acquire(filepath)
+
+
+class TestTmpfsIndex(object):
+    # The least recently used file MUST be deleted iff the budget is exceeded
+    def test_least_recently_used_is_evicted(self, index, tmp_path):
+        a = create_file(tmp_path, "a")
+        b = create_file(tmp_path, "b")
+        index.register(a)
+        index.register(b)
+        index.touch(a)
+
+        c = create_file(tmp_path, "c")
+        index.register(c)
+
+        assert os.path.isfile(a) and os.path.isfile(c)
+        assert not os.path.exists(b)
+        assert index.total_size() == 200
+
+    # Acquired files MUST NOT be deleted until they are released
+    def test_acquired_file_is_kept(self, index, tmp_path):
+        a = create_file(tmp_path, "a")
+        index.register(a)
+        assert index.acquire(a) is True
+
+        for name in ["b", "c"]:
+            index.register(create_file(tmp_path, name))
+        assert os.path.isfile(a)
+
+        index.release(a)
+        index.register(create_file(tmp_path, "d"))
+        assert not os.path.exists(a)
+        assert index.acquire(a) is False
+
+    # Failing to meet the budget MUST be reported
+    def test_exceeded_budget_is_reported(self, index, tmp_path):
+        for name in ["a", "b", "c"]:
+            index.register(create_file(tmp_path, name), acquire=True)
+
+        assert index.total_size() == 300
+        assert index.evict() is False
+
+        index.release(os.path.join(tmp_path, "a"))
+        assert index.evict() is True
+
+    # The index MUST be usable from several threads of a process
+    def test_threads(self, index, tmp_path):
+        filepaths = [create_file(tmp_path, x, size=10) for x in ["a", "b"]]
+        threads = [
+            threading.Thread(target=index.register, args=(x,)) for x in filepaths
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert index.total_size() == 20
+
+    # References of processes that terminated MUST NOT prevent eviction
+    def test_references_of_dead_processes_are_void(self, index, tmp_path):
+        a = create_file(tmp_path, "a")
+        index.register(a)
+
+        process = multiprocessing.get_context("spawn").Process(
+            target=acquire_and_exit, args=(a, index.maxsize)
+        )
+        process.start()
+        process.join()
+
+        for name in ["b", "c"]:
+            index.register(create_file(tmp_path, name))
+        assert not os.path.exists(a)
+
+    # Sidecar files of a download MUST be deleted together with it
+    def test_sidecar_files_are_evicted(self, index, tmp_path):
+        a = create_file(tmp_path, "a.fmu")
+        sidecars = [
+            create_file(tmp_path, f"a.fmu{x}", 0) for x in [".lock", ".headers.json"]
+        ]
+        index.register(a)
+
+        for name in ["b", "c"]:
+            index.register(create_file(tmp_path, name))
+
+        assert not any(os.path.exists(x) for x in [a, *sidecars])
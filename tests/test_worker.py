@@ -13,8 +13,25 @@ import numpy as np
 import pandas as pd
 import pytest
 
+from benchmarks.preprocessing import (
+    START_TIME,
+    assert_fmpy_input_equal,
+    make_input_timeseries,
+    prepare_legacy,
+)
+from benchmarks.stages import known_start_values, make_task_rep
 from tests import fmpy_issue89, mwe, pv_20181117_15kWp_saarbruecken
-from worker import prepare_bc_for_fmpy, simulate_fmu2_cs, timeseries_dict_to_pd_series
+from tests.conftest import test_data_base_path
+from worker import (
+    Timings,
+    content_hash,
+    prepare_bc_for_fmpy,
+    prepare_input_for_fmpy,
+    simulate_fmu2_cs,
+    simulation_key,
+    timeseries_dict_to_pd_series,
+    write_parameter_set,
+)
 
 
 @pytest.mark.parametrize(
@@ -59,6 +76,36 @@ class TestPreProcessing(object):
             pytest.skip("skipped because no expectation was specified")
 
 
+class TestInputPreparation(object):
+    # Input MUST be prepared directly from the timeseries objects
+    def test_from_timeseries_objects(self):
+        req_body = mwe()["data"]["mq_payload"]["request"]["body"]
+        desired = mwe()["expectations"]["prepare_bc_for_fmpy"]
+        offset = req_body["simulationParameters"]["startTime"]
+
+        actual = prepare_input_for_fmpy(req_body["inputTimeseries"], False, offset)
+
+        assert np.array_equal(actual, desired) is True
+
+    # Result MUST match the one of the previous implementation
+    def test_parity(self):
+        ts_dicts = make_input_timeseries(1000)
+
+        desired = prepare_legacy(ts_dicts, False, START_TIME)
+        actual = prepare_input_for_fmpy(ts_dicts, False, START_TIME)
+
+        assert_fmpy_input_equal(actual, desired)
+
+    # Time MUST be strictly increasing even if no series covers all points
+    def test_time_is_sorted(self):
+        ts_dicts = make_input_timeseries(1000)
+        ts_dicts.reverse()
+
+        actual = prepare_input_for_fmpy(ts_dicts, True)
+
+        assert np.all(np.diff(actual["time"]) > 0)
+
+
 @pytest.mark.parametrize(
     "ctx",
     [
@@ -147,3 +194,82 @@ class TestSimulateFMU2forCS(object):
     #         if log != '':
     #             log_obj = json.loads(log)
     #             print(log_obj['msg'])
+
+
+class TestChunkedSimulation(object):
+    # Chunks MUST add up to the result of the same simulation without chunks
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1000])
+    def test_chunks_add_up_to_result(self, tmp_path, chunk_size):
+        fmu_filepath = os.path.join(
+            test_data_base_path, "fmpy_issue89", "model_instance.fmu"
+        )
+        parameter_set_path = write_parameter_set({}, str(tmp_path))
+        task_rep = make_task_rep(fmu_filepath, 60, 1)
+
+        chunks = []
+        timings = Timings()
+        with known_start_values():
+            desired = simulate_fmu2_cs(fmu_filepath, parameter_set_path, task_rep)
+            actual = simulate_fmu2_cs(
+                fmu_filepath,
+                parameter_set_path,
+                task_rep,
+                on_chunk=chunks.append,
+                chunk_size=chunk_size,
+                timings=timings,
+            )
+
+        assert actual is None
+        assert all(len(x) <= chunk_size for x in chunks)
+        pd.testing.assert_frame_equal(pd.concat(chunks), desired)
+        assert "chunk" in timings.stages
+
+
+class TestContentHash(object):
+    # Hash MUST NOT depend on the order of keys but on the values
+    def test_content_hash(self):
+        a = content_hash({"a": 1.0, "b": [1, 2]})
+        b = content_hash({"b": [1, 2], "a": 1.0})
+        c = content_hash({"b": [1, 2], "a": 1.5})
+
+        assert a == b
+        assert a != c
+
+
+class TestSimulationKey(object):
+    task_rep = {
+        "requestId": "a",
+        "parameterSet": {"p": {"value": 1.0, "unit": "1"}},
+        "simulationParameters": {"startTime": 0, "stopTime": 3600},
+        "inputTimeseries": make_input_timeseries(100, seed=1),
+    }
+
+    # Key MUST only depend on what determines the result
+    def test_identical_jobs(self):
+        other = dict(self.task_rep, requestId="b")
+        other["inputTimeseries"] = [
+            dict(x, timeseries=list(reversed(x["timeseries"])))
+            for x in reversed(self.task_rep["inputTimeseries"])
+        ]
+
+        assert simulation_key("guid", self.task_rep, ["json"]) == simulation_key(
+            "guid", other, ["json"]
+        )
+
+    # Key MUST change with the model, the inputs and the simulation parameters
+    def test_different_jobs(self):
+        key = simulation_key("guid", self.task_rep, ["json"])
+
+        inputs = make_input_timeseries(100, seed=2)
+        stop_time = {"startTime": 0, "stopTime": 7200}
+        for other in [
+            simulation_key("other", self.task_rep, ["json"]),
+            simulation_key("guid", self.task_rep, ["columnar"]),
+            simulation_key(
+                "guid", dict(self.task_rep, inputTimeseries=inputs), ["json"]
+            ),
+            simulation_key(
+                "guid", dict(self.task_rep, simulationParameters=stop_time), ["json"]
+            ),
+        ]:
+            assert key != other
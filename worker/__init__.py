@@ -13,13 +13,51 @@ import sys
 import pandas as pd
 from loguru import logger
 
+from .batch import DEFAULT_BATCH_RESULT_FORMATS  # noqa
+from .batch import can_start_processes  # noqa
+from .batch import get_executor  # noqa
+from .batch import merge_variant  # noqa
+from .batch import run_variant  # noqa
+from .batch import run_variants  # noqa
+from .batch import run_variants_in_parallel  # noqa
+from .batch import shutdown_executor  # noqa
+from .download import DownloadError  # noqa
+from .download import download_file  # noqa
+from .download import fetch_file  # noqa
+from .download import get_session  # noqa
+from .metrics import SIZE_BUCKETS  # noqa
+from .metrics import Registry  # noqa
+from .metrics import start_http_server  # noqa
+from .metrics import write_textfile  # noqa
+from .model_description import read_model_description  # noqa
+from .pool import FMUPool  # noqa
+from .profiling import profile_filepath  # noqa
+from .profiling import profiled  # noqa
+from .store import DEFAULT_STORE_THRESHOLD  # noqa
+from .store import FilesystemResultStore  # noqa
+from .store import offload_result  # noqa
+from .store import serialize_result  # noqa
+from .timing import Timings  # noqa
+from .tmpfs import TmpfsIndex  # noqa
+from .worker import DEFAULT_RESULT_FORMATS  # noqa
 from .worker import FILLNA  # noqa
+from .worker import check_result_formats  # noqa
+from .worker import content_hash  # noqa
+from .worker import df_to_repr  # noqa
+from .worker import df_to_repr_columnar  # noqa
 from .worker import df_to_repr_json  # noqa
 from .worker import df_to_repr_jsonld  # noqa
+from .worker import get_parameter_values  # noqa
 from .worker import parse_model_description  # noqa
 from .worker import prepare_bc_for_fmpy  # noqa
+from .worker import prepare_input_for_fmpy  # noqa
+from .worker import repr_columnar_to_df  # noqa
 from .worker import simulate_fmu2_cs  # noqa
+from .worker import simulation_key  # noqa
+from .worker import timeseries_dict_to_arrays  # noqa
 from .worker import timeseries_dict_to_pd_series  # noqa
+from .worker import timeseries_hash  # noqa
+from .worker import write_parameter_set  # noqa
 
 
 # Configure logging
@@ -37,7 +75,7 @@ def sink_JSON_stdout_designetz(message):
         "process",
         "thread",
     ]
-    info_wanted = ["req_id", "code"]
+    info_wanted = ["req_id", "code", "timings", "cache"]
 
     record["name"] = "simaas_worker"
     record["time"] = record["time"].isoformat()
@@ -0,0 +1,209 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from . import logger
+from .pool import FMUPool
+from .tmpfs import TmpfsIndex
+from .worker import (
+    df_to_repr,
+    get_parameter_values,
+    simulate_fmu2_cs,
+    write_parameter_set,
+)
+
+# Representations returned per variant unless specified otherwise
+DEFAULT_BATCH_RESULT_FORMATS = ["columnar"]
+
+# Processes simulating variants in parallel <- created on first use
+executor = None
+executor_lock = threading.Lock()
+
+# Pool of FMU instances of a process simulating variants in parallel
+process_pool = None
+
+
+def merge_variant(batch_rep, variant):
+    """
+    Derive the task representation of one variant of a batch.
+
+    Properties of the variant replace those of the batch, except for
+    `simulationParameters`, which are updated key by key.
+    """
+
+    task_rep = {k: v for k, v in batch_rep.items() if k != "variants"}
+    for key, value in variant.items():
+        if key == "simulationParameters":
+            task_rep[key] = {**batch_rep.get(key, {}), **value}
+        else:
+            task_rep[key] = value
+
+    return task_rep
+
+
+def variant_error(index, e):
+    """Describe why the variant at `index` of a batch failed."""
+
+    return {
+        "index": index,
+        "status": "error",
+        "error": {"type": type(e).__name__, "message": str(e)},
+    }
+
+
+def run_variant(func, index, task_rep, *args):
+    """
+    Call `func(task_rep, *args)`; report failures instead of raising.
+
+    A failing variant MUST NOT abort the other variants of a batch.
+    """
+
+    try:
+        result = func(task_rep, *args)
+    except Exception as e:
+        logger.bind(req_id=task_rep.get("requestId")).warning(
+            f"Variant {index} of batch failed: {e!r}"
+        )
+        return variant_error(index, e)
+
+    return {"index": index, "status": "success", "result": result}
+
+
+def init_process(directory, pool_maxsize, pool_ttl, tmpfs_maxsize):
+    """Prepare process for simulating variants; keep FMUs for reuse."""
+
+    global process_pool
+
+    index = TmpfsIndex(directory, maxsize=tmpfs_maxsize)
+    process_pool = FMUPool(directory, maxsize=pool_maxsize, ttl=pool_ttl, index=index)
+
+
+def simulate_variant(task_rep, fmu_path, result_formats):
+    """Simulate one variant in a process prepared by `init_process`."""
+
+    directory = process_pool.directory
+    index = process_pool.index
+
+    parameter_set_path = write_parameter_set(get_parameter_values(task_rep), directory)
+    index.register(parameter_set_path, acquire=True)
+    try:
+        df = simulate_fmu2_cs(fmu_path, parameter_set_path, task_rep, pool=process_pool)
+    finally:
+        index.release(parameter_set_path)
+
+    input_time_is_relative = task_rep["simulationParameters"]["inputTimeIsRelative"]
+
+    return df_to_repr(df, fmu_path, input_time_is_relative, result_formats)
+
+
+def can_start_processes():
+    """
+    Check whether this process is allowed to start child processes.
+
+    Daemonic processes, such as those of Celery's prefork pool, are not.
+    """
+
+    return not multiprocessing.current_process().daemon
+
+
+def get_executor(processes, *initargs):
+    """
+    Get pool of processes for simulating variants in parallel.
+
+    The processes are spawned instead of forked, so that they do not
+    inherit loaded FMU binaries, open connections or locks. They are
+    kept for subsequent batches, such that their FMUs stay warm.
+    """
+
+    global executor
+
+    with executor_lock:
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_process,
+                initargs=initargs,
+            )
+
+        return executor
+
+
+def shutdown_executor():
+    """Terminate the processes for simulating variants in parallel."""
+
+    global executor
+
+    with executor_lock:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = None
+
+
+def run_variants_in_parallel(pool_executor, task_reps, *args):
+    """
+    Simulate variants using `pool_executor`, return results in order.
+
+    Also variants affected by the crash of a process (e.g. due to a
+    segmentation fault within the FMU) are reported as failed.
+    """
+
+    futures = []
+    try:
+        for index, task_rep in enumerate(task_reps):
+            futures.append(
+                pool_executor.submit(
+                    run_variant, simulate_variant, index, task_rep, *args
+                )
+            )
+    except Exception:
+        for future in futures:
+            future.cancel()
+        if executor is pool_executor:
+            shutdown_executor()
+        raise
+
+    results = []
+    for index, future in enumerate(futures):
+        try:
+            results.append(future.result())
+        except Exception as e:
+            logger.warning(f"Process simulating variant {index} failed: {e!r}")
+            results.append(variant_error(index, e))
+
+            # A broken pool can't be used anymore <- start over next time
+            if isinstance(e, BrokenProcessPool) and executor is pool_executor:
+                shutdown_executor()
+
+    return results
+
+
+def run_variants(func, task_reps, *args, processes=1, initargs=()):
+    """
+    Simulate variants, return results in the same order.
+
+    Iff `processes > 1`, the variants are distributed across that many
+    processes, set up by `init_process(*initargs)`. Otherwise, or iff
+    processes can't be started, `func(task_rep, *args)` runs each of
+    them sequentially within this process.
+    """
+
+    if processes > 1 and len(task_reps) > 1 and can_start_processes():
+        try:
+            pool_executor = get_executor(processes, *initargs)
+            return run_variants_in_parallel(pool_executor, task_reps, *args)
+        except Exception as e:
+            logger.warning(f"Failed to simulate variants in parallel: {e!r}")
+
+    return [
+        run_variant(func, index, task_rep, *args)
+        for index, task_rep in enumerate(task_reps)
+    ]
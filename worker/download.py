@@ -0,0 +1,190 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CHUNK_SIZE = 1024 * 1024
+TIMEOUT = 60
+
+# Files stored alongside a downloaded file <- deleted together with it
+SIDECAR_SUFFIXES = (".headers.json", ".lock")
+
+
+class DownloadError(Exception):
+    """Downloaded content is incomplete or does not match its checksum."""
+
+
+def get_session():
+    """Create HTTP session that reuses connections across downloads."""
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def get_expected_digest(response):
+    """
+    Extract SHA-256 digest announced by the server, if any.
+
+    Supports the `Digest` header (RFC 3230) as well as the
+    `Repr-Digest` header (RFC 9530).
+    """
+
+    for header in ["Repr-Digest", "Digest"]:
+        for item in response.headers.get(header, "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            if algorithm.lower() == "sha-256" and value != "":
+                return base64.b64decode(value.strip(":")).hex()
+
+    return None
+
+
+def get_sidecar_filepaths(filepath):
+    return [f"{filepath}{x}" for x in SIDECAR_SUFFIXES]
+
+
+def get_metadata_filepath(filepath):
+    return f"{filepath}.headers.json"
+
+
+def read_metadata(filepath):
+    """Read validators stored alongside a previously downloaded file."""
+
+    try:
+        with open(get_metadata_filepath(filepath), "r", encoding="utf8") as fp:
+            return json.load(fp)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def write_metadata(filepath, response):
+    """Store validators of the response for conditional requests."""
+
+    metadata = {}
+    for header in ["ETag", "Last-Modified"]:
+        if header in response.headers:
+            metadata[header] = response.headers[header]
+
+    with open(get_metadata_filepath(filepath), "w", encoding="utf8") as fp:
+        json.dump(metadata, fp)
+
+
+def download_file(session, href, filepath, headers=None, revalidate=False):
+    """
+    Stream resource to file; return whether the file was (re)written.
+
+    The content is written to a temporary file in chunks, validated and
+    only then renamed to `filepath`, so partially written files are never
+    visible. Iff `revalidate` is set and the file exists already, a
+    conditional request is sent and the file is kept if unchanged.
+    """
+
+    headers = dict(headers or {})
+    if revalidate is True and os.path.isfile(filepath):
+        metadata = read_metadata(filepath)
+        if "ETag" in metadata:
+            headers["If-None-Match"] = metadata["ETag"]
+        if "Last-Modified" in metadata:
+            headers["If-Modified-Since"] = metadata["Last-Modified"]
+
+    with session.get(href, headers=headers, stream=True, timeout=TIMEOUT) as r:
+        if r.status_code == 304:
+            return False
+        r.raise_for_status()
+
+        fd, tmp_filepath = tempfile.mkstemp(
+            prefix=".download-", dir=os.path.dirname(filepath)
+        )
+        try:
+            size = 0
+            digest = hashlib.sha256()
+            with os.fdopen(fd, "w+b") as fp:
+                for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                    fp.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+
+            # Ensure that the content is complete and as announced
+            expected_size = r.headers.get("Content-Length")
+            if "Content-Encoding" not in r.headers and expected_size is not None:
+                if size != int(expected_size):
+                    raise DownloadError(
+                        f"Expected {expected_size} bytes from {href}, got {size}"
+                    )
+            expected_digest = get_expected_digest(r)
+            if expected_digest is not None and expected_digest != digest.hexdigest():
+                raise DownloadError(f"SHA-256 digest of {href} does not match")
+            if filepath.endswith(".fmu") and not zipfile.is_zipfile(tmp_filepath):
+                raise DownloadError(f"Content of {href} is not a valid FMU")
+
+            os.replace(tmp_filepath, filepath)
+        except BaseException:
+            if os.path.isfile(tmp_filepath):
+                os.remove(tmp_filepath)
+            raise
+
+        write_metadata(filepath, r)
+
+    return True
+
+
+@contextmanager
+def file_lock(filepath):
+    """
+    Hold an exclusive lock on `filepath` while in context.
+
+    The lock is advisory and shared by all processes on the host, so it
+    serializes access to the tmpfs across worker processes. The lock
+    file may be deleted together with `filepath` at any time; a lock on
+    a deleted lock file is void, so locking is retried then.
+    """
+
+    lock_filepath = f"{filepath}.lock"
+    while True:
+        fp = open(lock_filepath, "a+b")
+        fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+        try:
+            if os.fstat(fp.fileno()).st_ino == os.stat(lock_filepath).st_ino:
+                break
+        except FileNotFoundError:
+            pass
+        fp.close()
+
+    try:
+        yield
+    finally:
+        fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+        fp.close()
+
+
+def fetch_file(session, href, filepath, headers=None, revalidate=False):
+    """
+    Download resource to file unless another process did so already.
+
+    Concurrent callers for the same `filepath` are serialized: exactly
+    one of them downloads the file while the others wait for it and then
+    use the finished file. Return whether the file was (re)written.
+    """
+
+    with file_lock(filepath):
+        if revalidate is False and os.path.isfile(filepath):
+            return False
+
+        return download_file(session, href, filepath, headers, revalidate)
@@ -0,0 +1,200 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import math
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# https://prometheus.io/docs/instrumenting/exposition_formats/#text-based-format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(4**x * 1024 for x in range(10))
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+
+    items = [f'{k}="{escape(v)}"' for k, v in labels]
+    return "{" + ",".join(items) + "}"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
+
+
+class Metric(object):
+    """
+    Named value per combination of labels.
+
+    Iff a `function` is given, it is called whenever the metric is
+    rendered and its return value is used instead.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name, documentation, function=None):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def samples(self):
+        if self.function is not None:
+            yield self.name, (), self.function()
+            return
+
+        with self.lock:
+            values = list(self.values.items())
+        for labels, value in values:
+            yield self.name, labels, value
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Value that only ever increases."""
+
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self):
+        with self.lock:
+            values = [(k, (list(c), s)) for k, (c, s) in self.values.items()]
+        for labels, (counts, total) in values:
+            for bound, count in zip(self.buckets, counts):
+                le = (("le", format_value(bound)),)
+                yield f"{self.name}_bucket", labels + le, count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, counts[-1]
+
+
+class Registry(object):
+    """Collection of metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        return "\n".join(x.render() for x in self.metrics.values()) + "\n"
+
+
+def write_textfile(registry, filepath):
+    """Atomically write metrics to file, e.g. for the textfile collector."""
+
+    directory = os.path.dirname(filepath)
+    fd, tmp_filepath = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf8") as fp:
+            fp.write(registry.render())
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        if os.path.isfile(tmp_filepath):
+            os.remove(tmp_filepath)
+        raise
+
+
+def start_http_server(registry, port, address="127.0.0.1"):
+    """Serve metrics at `/metrics` from a background thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            body = registry.render().encode("utf8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((address, port), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    return httpd
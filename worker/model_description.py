@@ -0,0 +1,112 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import bisect
+import itertools
+import os
+from collections.abc import Mapping
+
+import fmpy
+from cachetools import LRUCache, cached
+from cachetools.keys import hashkey
+
+MODEL_DESCRIPTION_CACHE_MAXSIZE = 64
+
+
+class ModelVariableIndex(Mapping):
+    """
+    Look up model variables without scanning all of them.
+
+    Behaves like a read-only dictionary of model variables by name.
+    Additional lookups by causality, name prefix and value reference
+    return lists in the order of declaration.
+    """
+
+    def __init__(self, model_variables):
+        self._variables = list(model_variables)
+        self._position = {}
+        self._by_name = {}
+        self._by_causality = {}
+        self._by_value_reference = {}
+
+        for position, x in enumerate(self._variables):
+            self._position[id(x)] = position
+            self._by_name[x.name] = x
+            self._by_causality.setdefault(x.causality, []).append(x)
+            self._by_value_reference.setdefault((x.type, x.valueReference), []).append(
+                x
+            )
+
+        self._sorted_names = sorted(self._by_name)
+
+    def __getitem__(self, name):
+        return self._by_name[name]
+
+    def __iter__(self):
+        return iter(self._by_name)
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def by_causality(self, causality):
+        """Return all variables of the given causality."""
+
+        return list(self._by_causality.get(causality, []))
+
+    def by_value_reference(self, value_reference, type="Real"):
+        """Return all variables (including aliases) of a value reference."""
+
+        return list(self._by_value_reference.get((type, value_reference), []))
+
+    def with_prefix(self, prefixes):
+        """Return all variables whose name starts with one of `prefixes`."""
+
+        if isinstance(prefixes, str):
+            prefixes = [prefixes]
+
+        found = {}
+        for prefix in prefixes:
+            start = bisect.bisect_left(self._sorted_names, prefix)
+            for name in itertools.islice(self._sorted_names, start, None):
+                if not name.startswith(prefix):
+                    break
+                x = self._by_name[name]
+                found[id(x)] = x
+
+        return sorted(found.values(), key=lambda x: self._position[id(x)])
+
+
+class ParsedModelDescription(object):
+    """Model description as read by FMPy plus an index of its variables."""
+
+    def __init__(self, model_description):
+        self.model_description = model_description
+        self.guid = model_description.guid
+        self.variables = ModelVariableIndex(model_description.modelVariables)
+
+
+def model_description_key(filepath):
+    """Identify a file by its path, modification time and size."""
+
+    stat = os.stat(filepath)
+
+    return hashkey(os.path.realpath(filepath), stat.st_mtime_ns, stat.st_size)
+
+
+# Global cache object <- each model description is parsed once per process
+model_description_cache = LRUCache(maxsize=MODEL_DESCRIPTION_CACHE_MAXSIZE)
+
+
+@cached(cache=model_description_cache, key=model_description_key)
+def read_model_description(filepath):
+    """
+    Read model description from .fmu-file or `modelDescription.xml`.
+
+    The parsed model description is cached until the file changes.
+    """
+
+    return ParsedModelDescription(fmpy.read_model_description(filepath, validate=True))
@@ -0,0 +1,207 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import fmpy
+from cachetools import LRUCache
+
+from . import logger
+from .model_description import read_model_description
+
+
+def get_directory_size(path):
+    """Return the total size of all files below `path` in bytes."""
+
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            size += os.stat(os.path.join(dirpath, filename)).st_size
+
+    return size
+
+
+class PooledFMU(object):
+    """Extracted FMU together with its instantiated FMU2Slave."""
+
+    def __init__(self, fmu_filepath, unzipdir, model_description, instance, index=None):
+        stat = os.stat(fmu_filepath)
+
+        self.source = (fmu_filepath, stat.st_mtime_ns, stat.st_size)
+        self.unzipdir = unzipdir
+        self.model_description = model_description
+        self.instance = instance
+        self.size = get_directory_size(unzipdir)
+        self.index = index
+        self.last_used = time.monotonic()
+        self.in_use = False
+        self.needs_renewal = False
+        self.checkouts = 0
+
+    def is_stale(self, fmu_filepath):
+        """Check whether the .fmu-file changed since it was extracted."""
+
+        try:
+            stat = os.stat(fmu_filepath)
+        except FileNotFoundError:
+            return True
+
+        return self.source != (fmu_filepath, stat.st_mtime_ns, stat.st_size)
+
+    def renew(self):
+        """
+        Replace the FMU instance by a fresh one.
+
+        The shared library stays loaded. `fmi2Reset` is not used since
+        not all exporting tools reset discrete states reliably.
+        """
+
+        self.instance.fmi2FreeInstance(self.instance.component)
+        self.instance.instantiate()
+
+    def release(self):
+        """Free the FMU instance and delete the extracted files."""
+
+        try:
+            self.instance.freeInstance()
+        except Exception as e:
+            logger.warning(f"Failed to free FMU instance: {e}")
+        shutil.rmtree(self.unzipdir, ignore_errors=True)
+        if self.index is not None:
+            self.index.remove(self.unzipdir)
+
+
+# https://cachetools.readthedocs.io/en/stable/#extending-cache-classes
+class FMUPool(LRUCache):
+    """
+    Keep extracted and instantiated FMUs around for reuse.
+
+    The pool is local to the process that created it. Its size is
+    bounded by the total size of the extracted directories; entries
+    that were not used for more than `ttl` seconds are evicted, too.
+
+    Iff a shared `index` of the directory is given, the extracted
+    directories are accounted for in it and protected from eviction by
+    other processes while checked out. Idle directories may be evicted
+    by any process to enforce the shared budget; the FMU is extracted
+    and instantiated again on its next checkout then.
+    """
+
+    def __init__(self, directory, maxsize, ttl, index=None):
+        super().__init__(maxsize=maxsize, getsizeof=lambda x: x.size)
+        self.directory = directory
+        self.ttl = ttl
+        self.index = index
+
+    def popitem(self):
+        key, entry = super().popitem()
+        entry.release()
+        return key, entry
+
+    def discard(self, key):
+        """Remove entry from pool and release its resources."""
+
+        entry = self.pop(key, None)
+        if entry is not None:
+            entry.release()
+
+    def expire(self):
+        """Evict entries that have been idle for longer than `ttl`."""
+
+        now = time.monotonic()
+        for key, entry in list(self.items()):
+            if (entry.in_use is False) and (now - entry.last_used > self.ttl):
+                self.discard(key)
+
+    def acquire(self, entry):
+        """Protect files of entry from eviction; `False` iff evicted already."""
+
+        return (self.index is None) or self.index.acquire(entry.unzipdir)
+
+    def load(self, fmu_filepath):
+        """Extract and instantiate an FMU 2.0 for CS."""
+
+        model_description = read_model_description(fmu_filepath).model_description
+
+        unzipdir = tempfile.mkdtemp(prefix="fmu-", dir=self.directory)
+        try:
+            fmpy.extract(fmu_filepath, unzipdir=unzipdir)
+            instance = fmpy.instantiate_fmu(
+                unzipdir, model_description, fmi_type="CoSimulation"
+            )
+        except Exception:
+            shutil.rmtree(unzipdir, ignore_errors=True)
+            raise
+
+        entry = PooledFMU(
+            fmu_filepath, unzipdir, model_description, instance, index=self.index
+        )
+        if self.index is not None:
+            self.index.register(unzipdir, size=entry.size, acquire=True)
+
+        return entry
+
+    @contextmanager
+    def checkout(self, fmu_filepath, key=None):
+        """
+        Provide exclusive access to a ready-to-use FMU instance.
+
+        The instance is renewed before it is handed out again. If the
+        simulation fails, the instance is discarded since its state is
+        unknown. Instances that cannot be pooled (too large, already in
+        use) are released after use.
+        """
+
+        if key is None:
+            key = fmu_filepath
+
+        self.expire()
+
+        entry = self.get(key)
+        if (entry is not None) and (entry.in_use is False):
+            if entry.is_stale(fmu_filepath) or not self.acquire(entry):
+                self.discard(key)
+                entry = None
+        pooled = (entry is not None) and (entry.in_use is False)
+
+        if pooled is False:
+            entry = self.load(fmu_filepath)
+            if (key not in self) and (entry.size <= self.maxsize):
+                self[key] = entry
+                pooled = True
+        elif entry.needs_renewal is True:
+            try:
+                entry.renew()
+            except Exception:
+                self.discard(key)
+                raise
+            entry.needs_renewal = False
+
+        entry.in_use = True
+        entry.checkouts += 1
+        try:
+            yield entry
+        except Exception:
+            entry.in_use = False
+            if pooled is True:
+                self.discard(key)
+            else:
+                entry.release()
+            raise
+
+        entry.in_use = False
+        entry.last_used = time.monotonic()
+        if pooled is True:
+            entry.needs_renewal = True
+            if self.index is not None:
+                self.index.release(entry.unzipdir)
+        else:
+            entry.release()
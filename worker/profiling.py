@@ -0,0 +1,53 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import cProfile
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+
+
+def profile_filepath(directory, tag, name):
+    """Return path of file to store the profile of task `name` in."""
+
+    tag = re.sub(r"[^A-Za-z0-9._-]", "_", str(tag))
+
+    return os.path.join(directory, f"{tag}-{name}.pstats")
+
+
+def dump_stats(profiler, filepath):
+    fd, tmp_filepath = tempfile.mkstemp(
+        prefix=".profile-", dir=os.path.dirname(filepath)
+    )
+    os.close(fd)
+    try:
+        profiler.dump_stats(tmp_filepath)
+        os.replace(tmp_filepath, filepath)
+    except BaseException:
+        if os.path.isfile(tmp_filepath):
+            os.remove(tmp_filepath)
+        raise
+
+
+@contextmanager
+def profiled(filepath):
+    """
+    Profile the code run in context using cProfile.
+
+    The statistics are written to `filepath` when leaving the context,
+    also iff an exception is raised; they can be inspected using the
+    `pstats`-module or converted into a flame graph by external tools.
+    """
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        dump_stats(profiler, filepath)
@@ -0,0 +1,151 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import time
+import uuid
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+# Results up to this size (as JSON) are returned inline by default
+DEFAULT_STORE_THRESHOLD = 1024 * 1024
+
+
+class FilesystemResultStore(object):
+    """
+    Store results as gzip-compressed JSON-files in a directory.
+
+    The directory may be a volume shared with the consumers of the
+    results, which resolve the `href` of the reference returned by
+    `put()` or pass the reference to `get()`.
+
+    Results are deleted after `ttl` seconds and, oldest first, while
+    all of them take up more than `maxsize` bytes; both are enforced
+    whenever a result is put into the store.
+    """
+
+    scheme = "file"
+
+    def __init__(self, directory, ttl=None, maxsize=None):
+        self.directory = os.path.abspath(directory)
+        self.ttl = ttl
+        self.maxsize = maxsize
+        os.makedirs(self.directory, exist_ok=True)
+
+    def put(self, data, id=None):
+        """Store serialized result, return reference to it."""
+
+        if id is None:
+            id = str(uuid.uuid4())
+        filepath = os.path.join(self.directory, f"{id}.json.gz")
+        content = gzip.compress(data, compresslevel=6)
+
+        fd, tmp_filepath = tempfile.mkstemp(prefix=".store-", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w+b") as fp:
+                fp.write(content)
+            os.replace(tmp_filepath, filepath)
+        except BaseException:
+            if os.path.isfile(tmp_filepath):
+                os.remove(tmp_filepath)
+            raise
+
+        self.cleanup(keep=filepath)
+
+        return {
+            "id": id,
+            "href": pathlib.Path(filepath).as_uri(),
+            "mediaType": "application/json",
+            "encoding": "gzip",
+            "size": len(content),
+            "length": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+
+    def get(self, reference):
+        """Load result identified by reference returned from `put()`."""
+
+        with open(self.filepath(reference), "rb") as fp:
+            return json.loads(gzip.decompress(fp.read()))
+
+    def delete(self, reference):
+        """Delete result identified by reference returned from `put()`."""
+
+        os.remove(self.filepath(reference))
+
+    def exists(self, reference):
+        """Check whether result identified by reference is still stored."""
+
+        return os.path.isfile(self.filepath(reference))
+
+    def filepath(self, reference):
+        return url2pathname(urlparse(reference["href"]).path)
+
+    def cleanup(self, keep=None):
+        """Delete results that expired or exceed the maximum size."""
+
+        if self.ttl is None and self.maxsize is None:
+            return
+
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json.gz") or entry.path == keep:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # deleted by a consumer or another process
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        total = sum(x[1] for x in entries)
+        if keep is not None:
+            total += os.stat(keep).st_size
+        now = time.time()
+        for mtime, size, filepath in entries:
+            expired = self.ttl is not None and now - mtime > self.ttl
+            exceeded = self.maxsize is not None and total > self.maxsize
+            if not (expired or exceeded):
+                break
+            try:
+                os.remove(filepath)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def serialize_result(result):
+    """Serialize result as compact JSON."""
+
+    return json.dumps(result, separators=(",", ":")).encode("utf8")
+
+
+def offload_result(
+    result, store, threshold=DEFAULT_STORE_THRESHOLD, id=None, data=None
+):
+    """
+    Put result into store iff it exceeds `threshold` bytes as JSON.
+
+    Return the result itself if it is small enough or no store is
+    given, a reference to the stored result otherwise. Pass the result
+    as serialized by `serialize_result()` as `data` iff available.
+    """
+
+    if store is None:
+        return result
+
+    if data is None:
+        data = serialize_result(result)
+    if len(data) <= threshold:
+        return result
+
+    return {"reference": store.put(data, id=id)}
@@ -5,37 +5,177 @@
 # SPDX-License-Identifier: MIT
 
 
+import functools
+import hashlib
+import inspect
 import json
 import os
-import uuid
-
-import requests
-import scipy.io as sio
-from cachetools import LRUCache, TTLCache, cached
+import tempfile
+import time
+from collections import Counter
+from operator import itemgetter
+
+from billiard.process import current_process
+from cachetools import Cache, LRUCache, TTLCache, cached
+from cachetools.keys import hashkey
+from celery import current_task, states
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_shutdown,
+)
 from fmi2rdf import assemble_graph
 
 from worker import (
-    df_to_repr_json,
-    df_to_repr_jsonld,
+    DEFAULT_BATCH_RESULT_FORMATS,
+    DEFAULT_RESULT_FORMATS,
+    DEFAULT_STORE_THRESHOLD,
+    SIZE_BUCKETS,
+    FilesystemResultStore,
+    FMUPool,
+    Registry,
+    Timings,
+    TmpfsIndex,
+    can_start_processes,
+    check_result_formats,
+    content_hash,
+    df_to_repr,
+    fetch_file,
+    get_parameter_values,
+    get_session,
     logger,
+    merge_variant,
+    offload_result,
     parse_model_description,
+    profile_filepath,
+    profiled,
+    read_model_description,
+    run_variants,
+    serialize_result,
+    shutdown_executor,
     simulate_fmu2_cs,
+    simulation_key,
+    start_http_server,
+    write_parameter_set,
+    write_textfile,
 )
 
 from .celery import app
 
+MODELINFO_CACHE_MAXSIZE = 64
+DEFAULT_RESULT_CACHE_MAXSIZE = 64 * 1024 * 1024
+
 # Specify directories in which to store temporary files
 tmp_dir = os.environ["SIMWORKER_TMPFS_PATH"]
 cache_maxsize = int(os.environ["SIMWORKER_TMPFS_MAXSIZE"])
+pool_maxsize = os.getenv("SIMWORKER_FMU_POOL_MAXSIZE")
+pool_ttl = float(os.getenv("SIMWORKER_FMU_POOL_TTL", 3600))
+revalidate_fmus = os.getenv("SIMWORKER_FMU_REVALIDATE", "false") == "true"
+batch_processes = int(os.getenv("SIMWORKER_BATCH_PROCESSES", 1))
+result_cache_maxsize = int(
+    os.getenv("SIMWORKER_RESULT_CACHE_MAXSIZE", DEFAULT_RESULT_CACHE_MAXSIZE)
+)
+result_cache_ttl = float(os.getenv("SIMWORKER_RESULT_CACHE_TTL", 300))
+result_store_path = os.getenv("SIMWORKER_RESULT_STORE_PATH")
+result_store_threshold = int(
+    os.getenv("SIMWORKER_RESULT_STORE_THRESHOLD", DEFAULT_STORE_THRESHOLD)
+)
+result_store_ttl = float(os.getenv("SIMWORKER_RESULT_STORE_TTL", 86400))
+result_store_maxsize = os.getenv("SIMWORKER_RESULT_STORE_MAXSIZE")
+metrics_port = os.getenv("SIMWORKER_METRICS_PORT")
+metrics_address = os.getenv("SIMWORKER_METRICS_ADDRESS", "127.0.0.1")
+metrics_textfile_dir = os.getenv("SIMWORKER_METRICS_TEXTFILE_DIR")
+metrics_enabled = metrics_port is not None or metrics_textfile_dir is not None
+profile_dir = os.getenv("SIMWORKER_PROFILE_DIR")
+profile_all = os.getenv("SIMWORKER_PROFILE", "false") == "true"
+warmup_models = [
+    x.strip() for x in os.getenv("SIMWORKER_WARMUP_MODELS", "").split(",") if x.strip()
+]
+
+# Index of files on tmpfs, shared by all processes <- enforces maximum size
+tmpfs_index = TmpfsIndex(tmp_dir, maxsize=cache_maxsize)
+
+# Metrics of this process <- exposed iff a port or textfile directory is set
+metrics = Registry()
+tasks_total = metrics.counter(
+    "simaas_worker_tasks_total", "Tasks processed, by task and final state"
+)
+tasks_in_progress = metrics.gauge(
+    "simaas_worker_tasks_in_progress", "Tasks currently processed, by task"
+)
+task_duration = metrics.histogram(
+    "simaas_worker_task_duration_seconds", "Time spent processing tasks, by task"
+)
+stage_duration = metrics.histogram(
+    "simaas_worker_stage_duration_seconds",
+    "Time spent per stage of simulation jobs, by stage",
+)
+result_size = metrics.histogram(
+    "simaas_worker_result_size_bytes",
+    "Size of task results serialized as JSON, by task; iff serialized anyway",
+    buckets=SIZE_BUCKETS,
+)
+cache_requests = metrics.counter(
+    "simaas_worker_cache_requests_total", "Cache lookups, by cache and result"
+)
+tmpfs_size = metrics.gauge(
+    "simaas_worker_tmpfs_size_bytes", "Total size of the files indexed on tmpfs"
+)
+tmpfs_entries = metrics.gauge(
+    "simaas_worker_tmpfs_entries", "Number of files indexed on tmpfs"
+)
+metrics.gauge(
+    "simaas_worker_tmpfs_maxsize_bytes",
+    "Maximum total size of the files on tmpfs",
+    function=lambda: cache_maxsize,
+)
+metrics.counter(
+    "simaas_worker_tmpfs_evictions_total",
+    "Files evicted from tmpfs by this process",
+    function=lambda: tmpfs_index.evictions,
+)
+
 
 # Helper classes
 # https://cachetools.readthedocs.io/en/stable/#extending-cache-classes
 class LRUCacheWithAssociatedFile(LRUCache):
-    def popitem(self):
-        instance_id, filepath = super().popitem()
-        if os.path.isfile(filepath):
-            os.remove(filepath)
-        return instance_id, filepath
+    """
+    Remember paths of files on tmpfs.
+
+    The files are owned by the shared `tmpfs_index`, which deletes them
+    iff the budget is exceeded; a file deleted by another process is
+    treated as cache miss.
+    """
+
+    def __getitem__(self, key):
+        filepath = super().__getitem__(key)
+        if not os.path.exists(filepath):
+            del self[key]
+            return self.__missing__(key)
+        tmpfs_index.touch(filepath)
+        cache_requests.inc(cache="tmpfs", result="hit")
+        return filepath
+
+    def __missing__(self, key):
+        cache_requests.inc(cache="tmpfs", result="miss")
+        raise KeyError(key)
+
+    def __setitem__(self, key, filepath):
+        tmpfs_index.register(filepath)
+        super().__setitem__(key, filepath)
+
+    def pop(self, key, *default):
+        # Forgetting a path (e.g. in `popitem`) is no access to the file
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        filepath = Cache.__getitem__(self, key)
+        del self[key]
+        return filepath
 
 
 # Global cache object <- use tmpfs-mount with maximum size of cache
@@ -44,121 +184,666 @@ lru_cache_bounded_by_total_filesize = LRUCacheWithAssociatedFile(
     maxsize=cache_maxsize,
 )
 
+
+def get_pool_maxsize(concurrency):
+    """Share the budget of tmpfs among the worker processes by default."""
+
+    if pool_maxsize is not None:
+        return int(pool_maxsize)
+
+    return cache_maxsize // max(concurrency, 1)
+
+
+# Per-process pool of extracted and instantiated FMUs
+fmu_pool = FMUPool(
+    tmp_dir,
+    maxsize=get_pool_maxsize(os.cpu_count() or 1),
+    ttl=pool_ttl,
+    index=tmpfs_index,
+)
+metrics.gauge(
+    "simaas_worker_fmu_pool_size_bytes",
+    "Total size of the extracted FMUs in the pool",
+    function=lambda: fmu_pool.currsize,
+)
+metrics.gauge(
+    "simaas_worker_fmu_pool_entries",
+    "Number of FMU instances in the pool",
+    function=lambda: len(fmu_pool),
+)
+
+# Results of recent simulation jobs <- identical requests aren't simulated again;
+# bounded by the total size of the results serialized as JSON
+result_cache = TTLCache(
+    maxsize=result_cache_maxsize, ttl=result_cache_ttl, getsizeof=itemgetter(1)
+)
+result_cache_stats = Counter(hits=0, misses=0)
+metrics.gauge(
+    "simaas_worker_result_cache_entries",
+    "Number of results in the result cache",
+    function=lambda: len(result_cache),
+)
+metrics.gauge(
+    "simaas_worker_result_cache_size_bytes",
+    "Total size of the results in the result cache, serialized as JSON",
+    function=lambda: result_cache.currsize,
+)
+
+# Model information by hash of everything it is derived from
+modelinfo_cache = LRUCache(maxsize=MODELINFO_CACHE_MAXSIZE)
+
+# Reuse connections for downloading FMUs
+http_session = get_session()
+
+# Large results are kept out of the result backend iff a store is configured
+result_store = None
+if result_store_path is not None:
+    result_store = FilesystemResultStore(
+        result_store_path,
+        ttl=result_store_ttl,
+        maxsize=None if result_store_maxsize is None else int(result_store_maxsize),
+    )
+
+if profile_dir is not None:
+    os.makedirs(profile_dir, exist_ok=True)
+
+
 # Helper functions
-@cached(cache=lru_cache_bounded_by_total_filesize)
+def get_digest(file_content):
+    return hashlib.sha256(file_content.encode("utf8")).hexdigest()
+
+
+@cached(
+    cache=lru_cache_bounded_by_total_filesize,
+    key=lambda file_content, extension: hashkey(get_digest(file_content), extension),
+)
 def get_tmp_filepath(file_content, extension):
-    """Store file content as file on tmpfs."""
+    """
+    Store file content as file on tmpfs.
 
-    id = uuid.uuid4()
+    The file is named after the hash of its content, so identical
+    content is only written once by all processes.
+    """
 
-    filepath = os.path.join(tmp_dir, f"{id}.{extension}")
+    filepath = os.path.join(tmp_dir, f"{get_digest(file_content)}.{extension}")
 
-    with open(filepath, "w+t", encoding="utf8") as fp:
-        fp.write(file_content)
+    # Iff file doesn't exist locally, write content to it
+    if not os.path.isfile(filepath):
+        fd, tmp_filepath = tempfile.mkstemp(suffix=f".{extension}", dir=tmp_dir)
+        with os.fdopen(fd, "w+t", encoding="utf8") as fp:
+            fp.write(file_content)
+        os.replace(tmp_filepath, filepath)
 
     return filepath
 
 
-@cached(cache=lru_cache_bounded_by_total_filesize)
 def get_fmu_filepath(model_href):
-    """Get filepath of model as FMU."""
+    """
+    Get filepath of model as FMU.
+
+    Iff revalidation is enabled, a conditional request is sent also for
+    models found in the cache, so that a replaced model is used as soon
+    as it changed on the server.
+    """
+
+    cached_already = hashkey(model_href) in lru_cache_bounded_by_total_filesize
+    filepath = download_fmu(model_href)
+
+    if revalidate_fmus is True and cached_already is True:
+        headers = {"accept": "application/octet-stream"}
+        if fetch_file(http_session, model_href, filepath, headers, revalidate=True):
+            tmpfs_index.register(filepath)
+
+    return filepath
 
-    filepath = os.path.join(tmp_dir, model_href.split("/")[-1], "model.fmu")
+
+@cached(cache=lru_cache_bounded_by_total_filesize)
+def download_fmu(model_href):
+    """
+    Download model as FMU unless available locally already.
+
+    The file is stored in a directory named after the hash of the whole
+    URL, since different models may share the last segment of theirs.
+    """
+
+    filepath = os.path.join(tmp_dir, get_digest(model_href), "model.fmu")
 
     # Iff .fmu-file doesn't exist locally, download it
-    if not os.path.isfile(filepath):
+    if revalidate_fmus is True or not os.path.isfile(filepath):
         # Prepare directory
-        dirname = os.path.dirname(filepath)
-        if not os.path.isdir(dirname):
-            os.mkdir(dirname)
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
 
-        # Download and save file
+        # Download and save file <- once, even if other processes want it, too
         headers = {"accept": "application/octet-stream"}
-        r = requests.get(model_href, headers=headers)
-        with open(filepath, "w+b") as fp:
-            fp.write(r.content)
+        fetch_file(
+            http_session, model_href, filepath, headers, revalidate=revalidate_fmus
+        )
 
     # Return local path to previously downloaded file
     return filepath
 
 
-@cached(
-    cache=lru_cache_bounded_by_total_filesize,
-    key=lambda x: x["modelInstanceId"],
-)
+def acquire_filepath(get_filepath, *args, attempts=3):
+    """
+    Get filepath and protect the file from eviction until released.
+
+    Retry iff another process evicted the file in the meantime.
+    """
+
+    for _ in range(attempts):
+        filepath = get_filepath(*args)
+        if tmpfs_index.acquire(filepath):
+            return filepath
+
+    raise FileNotFoundError(f"File for {args} was evicted {attempts} times")
+
+
+def parameter_set_key(task_rep):
+    return content_hash(get_parameter_values(task_rep))
+
+
+@cached(cache=lru_cache_bounded_by_total_filesize, key=parameter_set_key)
 def get_parameter_set_filepath(task_rep):
-    """Get filepath of parameter set as .mat-file."""
+    """
+    Get filepath of parameter set as .mat-file.
+
+    The file is shared by all model instances with identical parameter
+    values, regardless of the model they belong to.
+    """
+
+    return write_parameter_set(get_parameter_values(task_rep), tmp_dir)
+
+
+@worker_init.connect
+def share_pool_budget(sender=None, **kwargs):
+    """Size the FMU pools by the number of processes actually started."""
+
+    global fmu_pool
+
+    concurrency = getattr(sender, "concurrency", None)
+    if concurrency:
+        fmu_pool = FMUPool(
+            tmp_dir,
+            maxsize=get_pool_maxsize(concurrency),
+            ttl=pool_ttl,
+            index=tmpfs_index,
+        )
+
+
+# Warm up caches before the first task arrives
+@worker_init.connect
+def fetch_warmup_models(**kwargs):
+    """
+    Download and parse the configured models once per worker instance.
+
+    Runs in the main process, so forked child processes inherit the
+    parsed model descriptions and find the .fmu-files on tmpfs.
+    """
+
+    for model_href in warmup_models:
+        try:
+            t0 = time.perf_counter()
+            fmu_path = get_fmu_filepath(model_href)
+            t1 = time.perf_counter()
+            read_model_description(fmu_path)
+            t2 = time.perf_counter()
+        except Exception as e:
+            logger.warning(f"Failed to fetch {model_href} for warm-up: {e}")
+            continue
+
+        logger.info(
+            f"Fetched {model_href} for warm-up: download {t1 - t0:.3f} s, "
+            f"parsing {t2 - t1:.3f} s"
+        )
+
+    # Connections MUST NOT be shared with the child processes
+    http_session.close()
 
-    instance_id = task_rep["modelInstanceId"]
 
-    # Throw away units/only keep values
-    parameters = {}
-    for key, value in task_rep["parameterSet"].items():
-        parameters[key] = value["value"]
+@worker_process_init.connect
+def instantiate_warmup_models(**kwargs):
+    """
+    Extract and instantiate the configured models in each process.
+
+    Celery terminates processes that don't finish starting within
+    `worker_proc_alive_timeout`, so no further models are instantiated
+    once half of it has passed; the remaining ones are instantiated on
+    first use instead.
+    """
 
-    # Write parameter values to .mat-file
-    filepath = os.path.join(tmp_dir, instance_id + ".mat")
-    sio.savemat(filepath, parameters, format="4")
+    budget = (app.conf.worker_proc_alive_timeout or 4.0) / 2
+    t0 = time.perf_counter()
+    for i, model_href in enumerate(warmup_models):
+        if time.perf_counter() - t0 > budget:
+            logger.warning(
+                f"Skipped warming up {len(warmup_models) - i} models, "
+                f"exceeded {budget:.1f} s"
+            )
+            break
 
-    # Return local path to parameter set as .mat-file
-    return filepath
+        try:
+            fmu_path = acquire_filepath(get_fmu_filepath, model_href)
+        except Exception as e:
+            logger.warning(f"Failed to fetch {model_href} for warm-up: {e}")
+            continue
 
+        try:
+            t1 = time.perf_counter()
+            with fmu_pool.checkout(fmu_path, key=model_href):
+                pass
+            t2 = time.perf_counter()
+        except Exception as e:
+            logger.warning(f"Failed to instantiate {model_href} for warm-up: {e}")
+            continue
+        finally:
+            tmpfs_index.release(fmu_path)
 
-# Actual tasks
-@app.task
-def simulate(task_rep):
-    """Run simulation job and return result."""
+        logger.debug(f"Instantiated {model_href} for warm-up in {t2 - t1:.3f} s")
 
-    # Retrieve filepath of FMU
-    fmu_path = get_fmu_filepath(task_rep["modelHref"])
+    if warmup_models:
+        logger.info(
+            f"Warmed up {len(fmu_pool)} of {len(warmup_models)} models "
+            f"in {time.perf_counter() - t0:.3f} s"
+        )
+
+
+@worker_process_init.connect
+def check_batch_processes(**kwargs):
+    if batch_processes > 1 and not can_start_processes():
+        logger.warning(
+            "Variants of batches are simulated sequentially, since processes "
+            "of this worker pool can't start child processes"
+        )
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_batch_processes(**kwargs):
+    shutdown_executor()
+
+
+# Expose metrics of each worker process
+def metrics_filepath():
+    return os.path.join(metrics_textfile_dir, f"simaas_worker_{os.getpid()}.prom")
+
+
+def update_metrics():
+    """Refresh values that are shared with other processes."""
+
+    tmpfs_size.set(tmpfs_index.total_size())
+    tmpfs_entries.set(tmpfs_index.count())
+
+    if metrics_textfile_dir is not None:
+        write_textfile(metrics, metrics_filepath())
+
+
+@worker_process_init.connect
+def expose_metrics(**kwargs):
+    """
+    Serve metrics of this process and/or write them to a textfile.
+
+    Each process serves its metrics at the configured port plus its
+    index within the pool of worker processes.
+    """
+
+    if metrics_enabled is False:
+        return
+
+    if metrics_textfile_dir is not None:
+        os.makedirs(metrics_textfile_dir, exist_ok=True)
+    update_metrics()
+
+    if metrics_port is not None:
+        port = int(metrics_port) + getattr(current_process(), "index", 0)
+        start_http_server(metrics, port, address=metrics_address)
+        logger.info(f"Serving metrics at http://{metrics_address}:{port}/metrics")
+
+
+@worker_process_shutdown.connect
+def remove_metrics_textfile(**kwargs):
+    if metrics_textfile_dir is not None and os.path.isfile(metrics_filepath()):
+        os.remove(metrics_filepath())
+
+
+@task_prerun.connect
+def count_task_start(task=None, **kwargs):
+    tasks_in_progress.inc(task=task.name)
+    task.request.metrics_start = time.perf_counter()
+
+
+@task_postrun.connect
+def count_task_end(task=None, retval=None, state=None, **kwargs):
+    tasks_in_progress.dec(task=task.name)
+    tasks_total.inc(task=task.name, state=state)
+
+    start = getattr(task.request, "metrics_start", None)
+    if start is not None:
+        task_duration.observe(time.perf_counter() - start, task=task.name)
+
+    if metrics_enabled is False:
+        return
+
+    update_metrics()
+
+
+# Profile tasks on demand
+def profile_task(func):
+    """
+    Profile task iff enabled for all tasks or `profile` is set in its
+    representation; store the statistics in `profile_dir`.
+    """
+
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # The task representation is the last argument, also iff named
+        arguments = signature.bind(*args, **kwargs).arguments
+        task_rep = list(arguments.values())[-1]
+        if profile_all is False and task_rep.get("profile") is not True:
+            return func(*args, **kwargs)
+
+        if profile_dir is None:
+            logger.warning("Not profiling task, SIMWORKER_PROFILE_DIR is not set")
+            return func(*args, **kwargs)
+
+        tag = task_rep.get("requestId") or current_task.request.id
+        filepath = profile_filepath(profile_dir, tag, func.__name__)
+        with profiled(filepath):
+            result = func(*args, **kwargs)
+        logger.bind(req_id=task_rep.get("requestId")).info(
+            f"Stored profile of task as {filepath}"
+        )
+
+        return result
+
+    return wrapper
+
+
+def run_simulation(task_rep, fmu_path, result_formats, on_chunk=None, timings=None):
+    """
+    Simulate model instance defined by `task_rep`, return formatted result.
+
+    Iff `on_chunk` is given, the result is formatted and passed to it in
+    chunks of `chunkSize` rows while simulating; `None` is returned then.
+    """
+
+    if timings is None:
+        timings = Timings()
+    input_time_is_relative = task_rep["simulationParameters"]["inputTimeIsRelative"]
+
+    def render(df):
+        return df_to_repr(
+            df, fmu_path, input_time_is_relative, result_formats, timings=timings
+        )
 
     # Get path to .mat-file containing parameter set (=defining model instance)
-    parameter_set_path = get_parameter_set_filepath(task_rep)
+    key = parameter_set_key(task_rep)
+    timings.cache["parameterSet"] = key in lru_cache_bounded_by_total_filesize
+    with timings.measure("parameterSet"):
+        parameter_set_path = acquire_filepath(get_parameter_set_filepath, task_rep)
 
     # Simulate the model instance for the given input and record the result
-    df = simulate_fmu2_cs(fmu_path, parameter_set_path, task_rep)
+    options = dict(pool=fmu_pool, timings=timings)
+    if on_chunk is not None:
+        options.update(
+            on_chunk=lambda df: on_chunk(render(df)), chunk_size=task_rep["chunkSize"]
+        )
+    try:
+        df = simulate_fmu2_cs(fmu_path, parameter_set_path, task_rep, **options)
+    finally:
+        tmpfs_index.release(parameter_set_path)
+    if on_chunk is not None:
+        return None
     logger.debug(f"df\n{df}")
 
     # Perform post-processing if necessary
     pass
 
     # Format result and return (MUST be serializable as JSON)
-    input_time_is_relative = task_rep["simulationParameters"]["inputTimeIsRelative"]
-    data_as_json = df_to_repr_json(df, fmu_path, input_time_is_relative)
-    data_as_jsonld = df_to_repr_jsonld(df, fmu_path, input_time_is_relative)
+    return render(df)
+
+
+def run_cached_simulation(task_rep, fmu_path, result_formats, id, task, timings=None):
+    """
+    Return result of identical simulation job if available, else simulate.
+
+    The result is offloaded as task `id` iff too large for the result
+    backend. The cache holds what is returned then, i.e. a reference to
+    the stored result, so the result is neither serialized nor stored
+    again for identical jobs.
+    """
+
+    if timings is None:
+        timings = Timings()
+
+    if result_cache.maxsize == 0:
+        result = run_simulation(task_rep, fmu_path, result_formats, timings=timings)
+        with timings.measure("offload"):
+            return offload(result, id, task)
+
+    guid = read_model_description(fmu_path).guid
+    key = simulation_key(guid, task_rep, result_formats)
+
+    result, _ = result_cache.get(key, (None, 0))
+    if result is not None and not is_available(result):
+        del result_cache[key]
+        result = None
+    timings.cache["result"] = result is not None
+    if result is not None:
+        result_cache_stats["hits"] += 1
+        cache_requests.inc(cache="result", result="hit")
+    else:
+        result_cache_stats["misses"] += 1
+        cache_requests.inc(cache="result", result="miss")
+        simulated = run_simulation(task_rep, fmu_path, result_formats, timings=timings)
+        with timings.measure("offload"):
+            data = serialize_result(simulated)
+            result = offload(simulated, id, task, data=data)
+        size = len(data) if result is simulated else len(serialize_result(result))
+        if size <= result_cache.maxsize:
+            result_cache[key] = (result, size)
+
+    logger.bind(req_id=task_rep.get("requestId")).debug(
+        f"Result cache: {result_cache_stats['hits']} hits, "
+        f"{result_cache_stats['misses']} misses, {len(result_cache)} entries"
+    )
+
+    return result
+
+
+def is_available(result):
+    """Check whether a stored result wasn't deleted since it was stored."""
+
+    if "reference" not in result:
+        return True
+
+    return result_store is not None and result_store.exists(result["reference"])
+
+
+def offload(result, id, task, data=None):
+    """
+    Store result iff too large for the result backend.
+
+    The size of the result is recorded while serializing it for this
+    purpose or iff passed as serialized by `serialize_result()` in
+    `data`; results are not serialized only to record their size.
+    """
+
+    if data is None:
+        if result_store is None:
+            return result
+        data = serialize_result(result)
+    result_size.observe(len(data), task=task)
+
+    return offload_result(
+        result, result_store, result_store_threshold, id=id, data=data
+    )
+
+
+def check_chunk_size(chunk_size):
+    """Ensure that the result can be split into chunks of the given size."""
+
+    if not isinstance(chunk_size, int) or isinstance(chunk_size, bool):
+        raise ValueError(f"Chunk size must be an integer, got {chunk_size!r}")
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+
+
+# Actual tasks
+@app.task(bind=True)
+@profile_task
+def simulate(self, task_rep):
+    """
+    Run simulation job and return result.
+
+    Iff `chunkSize` is given, the result is published in chunks while
+    simulating, each stored in the result backend under the ID
+    `<task ID>-chunk-<index>`; the task itself reports its progress as
+    state `PROGRESS` and returns the IDs of all chunks.
+    """
+
+    # Only render the representations of the result that were asked for
+    result_formats = task_rep.get("resultFormats", DEFAULT_RESULT_FORMATS)
+    check_result_formats(result_formats)
+
+    chunked = task_rep.get("chunkSize") is not None
+    if chunked is True:
+        check_chunk_size(task_rep["chunkSize"])
+
+    log = logger.bind(req_id=task_rep.get("requestId"))
+    timings = Timings()
+    chunk_ids = []
+
+    def publish_chunk(result):
+        chunk_id = f"{self.request.id}-chunk-{len(chunk_ids)}"
+        with timings.measure("publish"):
+            result = offload(result, chunk_id, self.name)
+            app.backend.store_result(chunk_id, result, states.SUCCESS)
+        chunk_ids.append(chunk_id)
+        self.update_state(state="PROGRESS", meta={"chunks": chunk_ids})
+
+    # Retrieve filepath of FMU
+    timings.cache["fmu"] = hashkey(task_rep["modelHref"]) in (
+        lru_cache_bounded_by_total_filesize
+    )
+    with timings.measure("download"):
+        fmu_path = acquire_filepath(get_fmu_filepath, task_rep["modelHref"])
+
+    try:
+        if chunked is False:
+            result = run_cached_simulation(
+                task_rep,
+                fmu_path,
+                result_formats,
+                self.request.id,
+                self.name,
+                timings=timings,
+            )
+        else:
+            run_simulation(
+                task_rep,
+                fmu_path,
+                result_formats,
+                on_chunk=publish_chunk,
+                timings=timings,
+            )
+            result = {"chunks": chunk_ids}
+    finally:
+        tmpfs_index.release(fmu_path)
+
+    timings.log(log, "Simulation job finished")
+    for stage, duration in timings.stages.items():
+        stage_duration.observe(duration, stage=stage)
+
+    return result
+
+
+@app.task(bind=True)
+@profile_task
+def simulate_batch(self, batch_rep):
+    """
+    Run variants of one simulation job, return results in the same order.
+
+    Each item of `variants` is merged into the remaining properties of
+    `batch_rep`, which are common to all variants. The FMU is loaded once
+    for all of them; failed variants are reported in place of a result.
+    Each result has its own time axis, as variants may differ in it.
+    """
+
+    result_formats = batch_rep.get("resultFormats", DEFAULT_BATCH_RESULT_FORMATS)
+    check_result_formats(result_formats)
 
-    return {"json": data_as_json, "ld+json": data_as_jsonld}
+    # Retrieve filepath of FMU
+    fmu_path = acquire_filepath(get_fmu_filepath, batch_rep["modelHref"])
+
+    task_reps = [merge_variant(batch_rep, x) for x in batch_rep["variants"]]
+    try:
+        # Fan out to separate processes, each with its own FMU instances
+        results = run_variants(
+            run_simulation,
+            task_reps,
+            fmu_path,
+            result_formats,
+            processes=batch_processes,
+            initargs=(tmp_dir, fmu_pool.maxsize, pool_ttl, cache_maxsize),
+        )
+    finally:
+        tmpfs_index.release(fmu_path)
+
+    result = {"resultFormats": result_formats, "results": results}
+
+    return offload(result, self.request.id, self.name)
+
+
+def modelinfo_key(task_rep):
+    return content_hash(
+        [
+            task_rep["modelDescription"],
+            task_rep["templates"],
+            task_rep["records"],
+            task_rep["iri_prefix"],
+        ]
+    )
 
 
 @app.task
+@cached(cache=modelinfo_cache, key=modelinfo_key)
+@profile_task
 def get_modelinfo(task_rep):
-    """Use FMPy to derive JSON-schema from FMU."""
+    """
+    Use FMPy to derive JSON-schema from FMU.
+
+    The result is cached, so registering the same model again is cheap.
+    Only deriving it is profiled, answers from the cache are not.
+    """
 
     model_description = task_rep["modelDescription"]
-    md_filepath = get_tmp_filepath(model_description, "xml")
 
     template_parameters = task_rep["templates"]["parameter"]
-    t_p_filepath = get_tmp_filepath(template_parameters, "json.jinja")
-
     template_io = task_rep["templates"]["io"]
-    t_io_filepath = get_tmp_filepath(template_io, "json.jinja")
 
     records = task_rep["records"]
     iri_prefix = task_rep["iri_prefix"]
 
-    modelinfo = parse_model_description(
-        md_filepath, t_p_filepath, t_io_filepath, records
-    )
-
-    # Extract triples about FMU, serialized as JSON-LD; add to `modelinfo`
-    records = ",".join(task_rep["records"])
-    graph_serialized = assemble_graph(
-        md_filepath,
-        iri_prefix,
-        shapes=True,
-        blackbox=False,
-        records=records,
-    ).serialize(format="application/ld+json")
+    # Keep the file from being evicted while it is being parsed
+    md_filepath = acquire_filepath(get_tmp_filepath, model_description, "xml")
+    try:
+        modelinfo = parse_model_description(
+            md_filepath, template_parameters, template_io, records
+        )
+
+        # Extract triples about FMU, serialized as JSON-LD; add to `modelinfo`
+        records = ",".join(task_rep["records"])
+        graph_serialized = assemble_graph(
+            md_filepath,
+            iri_prefix,
+            shapes=True,
+            blackbox=False,
+            records=records,
+        ).serialize(format="application/ld+json")
+    finally:
+        tmpfs_index.release(md_filepath)
     modelinfo["graph"] = json.loads(graph_serialized)
 
     return json.dumps(modelinfo)
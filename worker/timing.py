@@ -0,0 +1,52 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import time
+from contextlib import contextmanager
+
+
+class Timings(object):
+    """
+    Record how long each stage of processing a request took.
+
+    Durations of stages that are entered repeatedly (e.g. once per chunk
+    of the result) are summed up. Time spent in a stage that is measured
+    within another one only counts towards the inner stage. Whether a
+    stage could use a cached object instead of creating it is recorded
+    in `cache`.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.cache = {}
+        self.nested = []
+
+    @contextmanager
+    def measure(self, stage):
+        """Add the time spent in context to the duration of `stage`."""
+
+        start = time.perf_counter()
+        self.nested.append(0.0)
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            nested = self.nested.pop()
+            self.stages[stage] = self.stages.get(stage, 0.0) + duration - nested
+            if self.nested:
+                self.nested[-1] += duration
+
+    def summary(self):
+        return ", ".join(f"{k} {v:.3f} s" for k, v in self.stages.items())
+
+    def log(self, log, message):
+        """Log durations and cache flags as fields of one message."""
+
+        timings = {k: round(v, 6) for k, v in self.stages.items()}
+        log.bind(timings=timings, cache=dict(self.cache)).info(
+            f"{message} ({self.summary()})"
+        )
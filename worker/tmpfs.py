@@ -0,0 +1,253 @@
+#! /usr/bin/python3
+# -*- coding: utf8 -*-
+
+# SPDX-FileCopyrightText: 2021 UdS AES <https://www.uni-saarland.de/lehrstuhl/frey.html>
+# SPDX-License-Identifier: MIT
+
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from . import logger
+from .download import get_sidecar_filepaths
+from .pool import get_directory_size
+
+INDEX_FILENAME = ".index.sqlite3"
+TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    atime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    path TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (path, pid)
+);
+"""
+
+
+def get_size(path):
+    """Return the size of a file or directory in bytes."""
+
+    if os.path.isdir(path):
+        return get_directory_size(path)
+
+    return os.stat(path).st_size
+
+
+def delete_path(path):
+    """Delete a file or directory and its sidecar files, if they exist."""
+
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+    for filepath in get_sidecar_filepaths(path):
+        if os.path.lexists(filepath):
+            os.remove(filepath)
+
+
+def is_alive(pid):
+    """Check whether a process with the given PID exists."""
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+class TmpfsIndex(object):
+    """
+    Account for the files on the tmpfs across all worker processes.
+
+    The index is an SQLite database in the directory itself, so all
+    processes sharing the directory also share one budget of `maxsize`
+    bytes. Files are deleted in order of their last access once the
+    budget is exceeded, except for files that are currently acquired
+    by a (living) process.
+    """
+
+    def __init__(self, directory, maxsize):
+        self.filepath = os.path.join(directory, INDEX_FILENAME)
+        self.maxsize = maxsize
+        self.evictions = 0  # performed by this process
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        # SQLite connections MUST NOT be used across `fork()` or threads
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.connection = sqlite3.connect(
+                self.filepath, timeout=TIMEOUT, isolation_level=None
+            )
+            local.connection.executescript(SCHEMA)
+            local.pid = os.getpid()
+
+        return local.connection
+
+    @contextmanager
+    def transaction(self):
+        """Hold the write lock of the index while in context."""
+
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def register(self, path, size=None, acquire=False):
+        """Add file or directory to the index and enforce the budget."""
+
+        if size is None:
+            size = get_size(path)
+
+        with self.transaction() as db:
+            db.execute(
+                "INSERT INTO entries (path, size, atime) VALUES (?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE "
+                "SET size = excluded.size, atime = excluded.atime",
+                (path, size, time.time()),
+            )
+            if acquire is True:
+                self._acquire(db, path)
+            self._evict(db, keep=path)
+
+    def touch(self, path):
+        """Mark entry as recently used."""
+
+        with self.transaction() as db:
+            db.execute(
+                "UPDATE entries SET atime = ? WHERE path = ?", (time.time(), path)
+            )
+
+    def acquire(self, path):
+        """
+        Protect entry from eviction until it is released.
+
+        Return `False` iff the entry has been deleted already.
+        """
+
+        with self.transaction() as db:
+            if not os.path.exists(path):
+                db.execute("DELETE FROM entries WHERE path = ?", (path,))
+                return False
+
+            db.execute(
+                "INSERT OR IGNORE INTO entries (path, size, atime) VALUES (?, ?, ?)",
+                (path, get_size(path), time.time()),
+            )
+            self._acquire(db, path)
+
+        return True
+
+    def _acquire(self, db, path):
+        db.execute(
+            "INSERT INTO refs (path, pid, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (path, pid) DO UPDATE SET count = count + 1",
+            (path, os.getpid()),
+        )
+        db.execute("UPDATE entries SET atime = ? WHERE path = ?", (time.time(), path))
+
+    def release(self, path):
+        """Allow entry to be evicted again."""
+
+        with self.transaction() as db:
+            db.execute(
+                "UPDATE refs SET count = count - 1 WHERE path = ? AND pid = ?",
+                (path, os.getpid()),
+            )
+            db.execute("DELETE FROM refs WHERE count <= 0")
+            self._evict(db)
+
+    @contextmanager
+    def using(self, path):
+        """Protect entry from eviction while in context."""
+
+        if not self.acquire(path):
+            raise FileNotFoundError(path)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def remove(self, path):
+        """Remove entry from the index without deleting it."""
+
+        with self.transaction() as db:
+            db.execute("DELETE FROM refs WHERE path = ?", (path,))
+            db.execute("DELETE FROM entries WHERE path = ?", (path,))
+
+    def total_size(self):
+        """Return the total size of all indexed entries in bytes."""
+
+        row = self.connection.execute("SELECT TOTAL(size) FROM entries").fetchone()
+
+        return int(row[0])
+
+    def count(self):
+        """Return the number of indexed entries."""
+
+        return self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def evict(self):
+        """
+        Delete least recently used entries until the budget is met.
+
+        Return `False` iff the entries in use alone exceed the budget.
+        """
+
+        with self.transaction() as db:
+            return self._evict(db)
+
+    def _evict(self, db, keep=None):
+        """Return whether the total size is within the budget afterwards."""
+
+        total = db.execute("SELECT TOTAL(size) FROM entries").fetchone()[0]
+        if total <= self.maxsize:
+            return True
+
+        # References held by processes that died are void
+        for (pid,) in db.execute("SELECT DISTINCT pid FROM refs").fetchall():
+            if not is_alive(pid):
+                db.execute("DELETE FROM refs WHERE pid = ?", (pid,))
+
+        candidates = db.execute(
+            "SELECT path, size FROM entries "
+            "WHERE path NOT IN (SELECT path FROM refs) AND path IS NOT ? "
+            "ORDER BY atime",
+            (keep,),
+        ).fetchall()
+        for path, size in candidates:
+            if total <= self.maxsize:
+                break
+            logger.debug(f"Evicting {path} ({size} bytes) from tmpfs")
+            delete_path(path)
+            db.execute("DELETE FROM entries WHERE path = ?", (path,))
+            total -= size
+            self.evictions += 1
+
+        if total > self.maxsize:
+            logger.warning(
+                f"Files on tmpfs exceed budget ({int(total)} of {self.maxsize} "
+                "bytes), remaining files are in use"
+            )
+            return False
+
+        return True
@@ -5,24 +5,35 @@
 # SPDX-License-Identifier: MIT
 
 
+import base64
+import functools
+import hashlib
 import json
 import os
+import tempfile
+import zlib
+from operator import itemgetter
 
 import fmpy
-import nanoid
 import numpy as np
 import pandas as pd
 import pendulum
 import rdflib
-from jinja2 import Environment, FileSystemLoader
+import scipy.io as sio
+from cachetools import LRUCache, cached
+from cachetools.keys import hashkey
+from jinja2 import Environment
+from nanoid.resources import alphabet as nanoid_alphabet
 from pydash import py_
 from rdflib.namespace import OWL, RDF, SOSA, TIME, XSD  # FOAF,; PROV,; SSN,
 
 from . import logger
+from .model_description import read_model_description
+from .timing import Timings
 
 FILLNA = 0
+TEMPLATE_CACHE_MAXSIZE = 64
 ENV = Environment(
-    loader=FileSystemLoader(os.environ["SIMWORKER_TMPFS_PATH"]),
     trim_blocks=True,
     lstrip_blocks=True,
 )
@@ -48,6 +59,14 @@ def graph_bind_prefixes(graph):
     return graph
 
 
+def content_hash(obj):
+    """Hash JSON-serializable object, independent of the order of keys."""
+
+    serialized = json.dumps(obj, sort_keys=True, separators=(",", ":"))
+
+    return hashlib.sha256(serialized.encode("utf8")).hexdigest()
+
+
 def cast_to_type(var, type):
     if var == None:
         return var
@@ -115,8 +134,22 @@ def scalar_variable_as_obj(x):
     return py_.pick_by(obj, lambda x: x is not None)
 
 
-def render_template(template_path, objects):
-    template = ENV.get_template(template_path)
+# Global cache object <- each template is compiled once per process
+template_cache = LRUCache(maxsize=TEMPLATE_CACHE_MAXSIZE)
+
+
+@cached(
+    cache=template_cache,
+    key=lambda source: hashkey(hashlib.sha256(source.encode("utf8")).hexdigest()),
+)
+def compile_template(source):
+    """Compile Jinja-template from source; cached by hash of the source."""
+
+    return ENV.from_string(source)
+
+
+def render_template(template_source, objects):
+    template = compile_template(template_source)
     required = []
     for obj in objects:
         if not py_.has(obj, "start"):
@@ -130,18 +163,13 @@ def parse_model_description(md_path, template_parameters, template_io, records):
 
     Reads the model description and derives JSON-schemata
     for parameterization/inputs/outputs to be embedded in
-    the OpenAPI-Specification of the API.
+    the OpenAPI-Specification of the API. The templates
+    are passed as source code.
     """
 
-    def find_model_parameters(x, record_component_names):
-        a = False
-        for name in record_component_names:
-            a |= py_.starts_with(x.name, name)
-
-        return a
-
     # Read the model description using FMPy
-    md = fmpy.read_model_description(md_path)
+    desc = read_model_description(md_path)
+    md = desc.model_description
 
     # Fill in basic properties of FMU
     parsed = {
@@ -158,28 +186,25 @@ def parse_model_description(md_path, template_parameters, template_io, records):
     jobs = [
         {
             "name": "parameter",
-            "selector": lambda x: find_model_parameters(x, records),
-            "template": os.path.basename(template_parameters),
+            "variables": desc.variables.with_prefix(records),
+            "template": template_parameters,
         },
         {
             "name": "input",
-            "selector": lambda x: x.causality == "input",
-            "template": os.path.basename(template_io),
+            "variables": desc.variables.by_causality("input"),
+            "template": template_io,
         },
         {
             "name": "output",
-            "selector": lambda x: x.causality == "output",
-            "template": os.path.basename(template_io),
+            "variables": desc.variables.by_causality("output"),
+            "template": template_io,
         },
     ]
 
     for job in jobs:
-        # Filter model variables
-        scalar_variables = py_.filter(md.modelVariables, job["selector"])
-
         # Represent each `ScalarVariable`-instance as dictionary
         objects = []
-        for var in scalar_variables:
+        for var in job["variables"]:
             objects.append(scalar_variable_as_obj(var))
 
         # Render schema from template
@@ -189,6 +214,41 @@ def parse_model_description(md_path, template_parameters, template_io, records):
     return parsed
 
 
+def timeseries_dict_to_arrays(ts_dict):
+    """
+    Turn timeseries object v1.3.0 into sorted np.ndarrays.
+
+    Returns the timestamps and the values as separate arrays; missing
+    values are represented as NaN.
+    """
+
+    objects = ts_dict["timeseries"]
+    timestamps = np.array(list(map(itemgetter("timestamp"), objects)))
+    values = np.array(list(map(itemgetter("value"), objects)), dtype=np.double)
+
+    order = np.argsort(timestamps, kind="stable")
+
+    return timestamps[order], values[order]
+
+
+def timeseries_hash(ts_dicts):
+    """
+    Hash input time series by their content.
+
+    The order of the series and of the items within them doesn't matter.
+    """
+
+    digest = hashlib.sha256()
+    for ts_dict in sorted(ts_dicts, key=itemgetter("label")):
+        timestamps, values = timeseries_dict_to_arrays(ts_dict)
+        header = [ts_dict["label"], ts_dict.get("unit"), len(timestamps)]
+        digest.update(json.dumps(header).encode("utf8"))
+        digest.update(np.ascontiguousarray(timestamps, dtype="<f8").tobytes())
+        digest.update(np.ascontiguousarray(values, dtype="<f8").tobytes())
+
+    return digest.hexdigest()
+
+
 def timeseries_dict_to_pd_series(ts_dict):
     """
     Turn timeseries object v1.3.0 into sorted pd.Series.
@@ -198,12 +258,9 @@ def timeseries_dict_to_pd_series(ts_dict):
     The data is not changed, just represented differently!
     """
 
-    timestamps = []
-    values = []
-
-    for obj in ts_dict["timeseries"]:
-        timestamps.append(obj["timestamp"])
-        values.append(obj["value"])
+    objects = ts_dict["timeseries"]
+    timestamps = list(map(itemgetter("timestamp"), objects))
+    values = list(map(itemgetter("value"), objects))
 
     s = pd.Series(values, index=timestamps, name=ts_dict["label"])
     s.sort_index(inplace=True)
@@ -211,35 +268,145 @@ def timeseries_dict_to_pd_series(ts_dict):
     return s
 
 
+def merge_timeseries(timestamps, values):
+    """
+    Merge time series onto the union of their time axes.
+
+    Missing values are interpolated linearly between the neighbouring
+    rows of the merged time axis, i.e. like `pd.DataFrame.interpolate`
+    does after an outer join: values after the last known value are
+    held constant, values before the first known value remain NaN.
+    """
+
+    time = functools.reduce(np.union1d, timestamps)
+    rows = np.arange(len(time), dtype=np.double)
+
+    columns = []
+    for t, v in zip(timestamps, values):
+        column = np.full(len(time), np.nan)
+        column[np.searchsorted(time, t)] = v
+
+        known = ~np.isnan(column)
+        if known.any() and not known.all():
+            column = np.interp(rows, rows[known], column[known], left=np.nan)
+        columns.append(column)
+
+    return time, columns
+
+
+def to_fmpy_input(labels, time, columns, is_relative, offset=None):
+    """Turn merged time series into structured np.ndarray for FMPy."""
+
+    # Ensure that seconds relative to offset are used as time
+    if is_relative == False:
+        time = (time - offset) / 1000
+
+    dtype = [("time", np.double)] + [(label, np.double) for label in labels]
+    ndarray = np.empty(len(time), dtype=dtype)
+    ndarray["time"] = time
+    for label, column in zip(labels, columns):
+        ndarray[label] = column
+
+    return ndarray
+
+
 def prepare_bc_for_fmpy(ts, is_relative, offset=None):
     """Turn array of pd.Series into correctly shaped np.ndarray."""
 
-    df = pd.DataFrame(ts[0])
-    df = df.join(
-        ts[1:], how="outer"
-    )  # use how='outer' to not drop rows with missing values
+    time, columns = merge_timeseries(
+        [s.index.to_numpy() for s in ts],
+        [s.to_numpy(dtype=np.double) for s in ts],
+    )
 
-    # Deal with missing values explicitly
-    # TODO decide which method to use!
-    # df.fillna(value=FILLNA, inplace=True)
-    df.interpolate(method="linear", inplace=True)  # XXX interpolation!
+    return to_fmpy_input([s.name for s in ts], time, columns, is_relative, offset)
 
-    # Ensure that seconds relative to offset are used as index
-    if is_relative == False:
-        df["time_rel"] = df.index
-        df["time_rel"] = df["time_rel"].apply(lambda x: float((x - offset) / 1000))
-        df.set_index("time_rel", inplace=True)
 
-    df.index.rename("time", inplace=True)
+def prepare_input_for_fmpy(ts_dicts, is_relative, offset=None):
+    """Turn array of timeseries objects v1.3.0 into np.ndarray for FMPy."""
 
-    # Transform into np.ndarray with correct dtypes
-    ndarray = np.array(df.to_records())
+    if len(ts_dicts) == 0:
+        return None
 
-    return ndarray
+    labels = []
+    timestamps = []
+    values = []
+    for ts_dict in ts_dicts:
+        t, v = timeseries_dict_to_arrays(ts_dict)
+        labels.append(ts_dict["label"])
+        timestamps.append(t)
+        values.append(v)
+
+    time, columns = merge_timeseries(timestamps, values)
+
+    return to_fmpy_input(labels, time, columns, is_relative, offset)
+
+
+def get_parameter_values(task_rep):
+    """Throw away units/only keep values of parameter set."""
+
+    parameters = {}
+    for key, value in task_rep["parameterSet"].items():
+        parameters[key] = value["value"]
+
+    return parameters
 
 
-def simulate_fmu2_cs(fmu_filepath, parameter_set_filepath, options):
-    """Simulate FMU 2.0 for CS, return result as pd.DataFrame."""
+def write_parameter_set(parameters, directory):
+    """
+    Store parameter values as .mat-file in `directory`, return its path.
+
+    The file is named after the hash of the parameter values, so it is
+    only written once for identical parameter sets.
+    """
+
+    filepath = os.path.join(directory, f"{content_hash(parameters)}.mat")
+
+    # Iff .mat-file doesn't exist locally, write parameter values to it
+    if not os.path.isfile(filepath):
+        fd, tmp_filepath = tempfile.mkstemp(suffix=".mat", dir=directory)
+        os.close(fd)
+        sio.savemat(tmp_filepath, parameters, format="4")
+        os.replace(tmp_filepath, filepath)
+
+    return filepath
+
+
+def simulation_key(guid, task_rep, result_formats):
+    """Identify the result of a simulation job regardless of the request."""
+
+    return (
+        guid,
+        content_hash(get_parameter_values(task_rep)),
+        timeseries_hash(task_rep["inputTimeseries"]),
+        content_hash(task_rep["simulationParameters"]),
+        tuple(result_formats),
+    )
+
+
+def simulate_fmu2_cs(
+    fmu_filepath,
+    parameter_set_filepath,
+    options,
+    pool=None,
+    on_chunk=None,
+    chunk_size=None,
+    timings=None,
+):
+    """
+    Simulate FMU 2.0 for CS, return result as pd.DataFrame.
+
+    Iff a `FMUPool` is given, an extracted and instantiated FMU is taken
+    from the pool instead of unpacking the .fmu-file for each run.
+
+    Iff `on_chunk` is given, the result is passed to it as a sequence of
+    pd.DataFrames of `chunk_size` rows (at most) while the simulation is
+    running and `None` is returned instead.
+
+    The duration of each stage is added to `timings`, if given.
+    """
+
+    if timings is None:
+        timings = Timings()
 
     # Ensure that logs can be correlated to requests
     req_id = options["requestId"]
@@ -252,12 +419,6 @@ def simulate_fmu2_cs(fmu_filepath, parameter_set_filepath, options):
     input_time_is_relative = options["simulationParameters"]["inputTimeIsRelative"]
 
     # Prepare input data
-    input_timeseries = []
-    input_units = []
-    for ts_obj in options["inputTimeseries"]:
-        input_timeseries.append(timeseries_dict_to_pd_series(ts_obj))
-        input_units.append(ts_obj["unit"])
-
     if input_time_is_relative is True:
         start_time = options["simulationParameters"]["startTime"]
         stop_time = options["simulationParameters"]["stopTime"]
@@ -272,7 +433,10 @@ def simulate_fmu2_cs(fmu_filepath, parameter_set_filepath, options):
             / 1000
         )
         offset = options["simulationParameters"]["startTime"]
-    input_ts = prepare_bc_for_fmpy(input_timeseries, input_time_is_relative, offset)
+    with timings.measure("prepareInput"):
+        input_ts = prepare_input_for_fmpy(
+            options["inputTimeseries"], input_time_is_relative, offset
+        )
 
     log.trace(f"start_time: {start_time}")
     log.trace(f"stop_time: {stop_time}")
@@ -294,8 +458,7 @@ def simulate_fmu2_cs(fmu_filepath, parameter_set_filepath, options):
 
     # Execute simulation
     # -- inside the FMU, time is represented in seconds starting at zero!
-    sim_result = fmpy.simulate_fmu(
-        fmu_filepath,
+    simulation_options = dict(
         validate=True,
         start_time=start_time,
         stop_time=stop_time,
@@ -306,12 +469,87 @@ def simulate_fmu2_cs(fmu_filepath, parameter_set_filepath, options):
         input=input_ts,
         fmi_call_logger=log.trace,
     )
+    if on_chunk is not None:
+
+        def step_finished(time, recorder):
+            # Hand over recorded rows instead of keeping all of them
+            chunk = take_recorded_rows(recorder, chunk_size)
+            while chunk is not None:
+                with timings.measure("dataFrame"):
+                    df = sim_result_to_df(chunk, options)
+                with timings.measure("chunk"):
+                    on_chunk(df)
+                chunk = take_recorded_rows(recorder, chunk_size)
+            return True
+
+        simulation_options["step_finished"] = step_finished
+
+    if pool is None:
+        model_description = read_model_description(fmu_filepath).model_description
+        with timings.measure("simulate"):
+            sim_result = fmpy.simulate_fmu(
+                fmu_filepath, model_description=model_description, **simulation_options
+            )
+    else:
+        with timings.measure("simulate"):
+            with pool.checkout(fmu_filepath, key=options.get("modelHref")) as fmu:
+                timings.cache["fmuInstance"] = fmu.checkouts > 1
+                fmu.instance.fmiCallLogger = log.trace
+                sim_result = fmpy.simulate_fmu(
+                    fmu.unzipdir,
+                    model_description=fmu.model_description,
+                    fmu_instance=fmu.instance,
+                    **simulation_options,
+                )
+
+    # Hand over the remaining part of a chunked result
+    if on_chunk is not None:
+        for start in range(0, len(sim_result), chunk_size):
+            with timings.measure("dataFrame"):
+                df = sim_result_to_df(sim_result[start : start + chunk_size], options)
+            with timings.measure("chunk"):
+                on_chunk(df)
+        return None
 
     # Return simulation result as pd.DataFrame
-    df = pd.DataFrame(sim_result)
+    with timings.measure("dataFrame"):
+        df = sim_result_to_df(sim_result, options)
     log.trace(f"df\n{df}")
 
-    if input_time_is_relative is True:
+    return df
+
+
+def take_recorded_rows(recorder, n):
+    """
+    Remove the first `n` rows recorded by FMPy iff there are as many.
+
+    FMPy offers no public interface for consuming the result while
+    simulating, so this relies on the attributes `rows` and `cols` of
+    `fmpy.simulation.Recorder` (checked for FMPy 0.3.5 to 0.3.22).
+    """
+
+    try:
+        rows, cols = recorder.rows, recorder.cols
+    except AttributeError:
+        raise RuntimeError(
+            f"Chunked results aren't supported with FMPy {fmpy.__version__}"
+        ) from None
+
+    if len(rows) < n:
+        return None
+
+    chunk = np.array(rows[:n], dtype=np.dtype(cols))
+    del rows[:n]
+
+    return chunk
+
+
+def sim_result_to_df(sim_result, options):
+    """Convert (part of) the result of FMPy to pd.DataFrame."""
+
+    df = pd.DataFrame(sim_result)
+
+    if options["simulationParameters"]["inputTimeIsRelative"] is True:
         df.set_index(pd.Index(df["time"], dtype="float"), inplace=True)
     else:
         df["time"] = df["time"] * 1000 + options["simulationParameters"]["startTime"]
@@ -330,40 +568,79 @@ def simulate_fmu2_cs(fmu_filepath, parameter_set_filepath, options):
 
     del df["time"]
 
-    log.trace(f"df\n{df}")
-
     return df
 
 
+def datetime_index_to_arrays(index):
+    """
+    Represent DatetimeIndex as epoch milliseconds and ISO 8601 strings.
+
+    Both arrays are computed at once instead of row by row. Times are
+    given in UTC with millisecond precision; fractional seconds are
+    only included if present.
+    """
+
+    if index.tz is None:
+        index = index.tz_localize("utc")
+    values = index.tz_convert("utc").tz_localize(None).values.astype("datetime64[ms]")
+
+    timestamps = values.astype(np.int64)
+    datetimes = np.where(
+        timestamps % 1000 == 0,
+        np.datetime_as_string(values, unit="s"),
+        np.datetime_as_string(values, unit="us"),
+    )
+    datetimes = np.char.add(datetimes, "+00:00")
+
+    return timestamps, datetimes
+
+
+def series_to_list(series):
+    """Turn pd.Series into list of native values, representing NaN as None."""
+
+    if series.isna().any():
+        series = series.astype(object).where(series.notna(), None)
+
+    return series.tolist()
+
+
 def df_to_repr_json(df, fmu, time_is_relative):
     """Render JSON-representation of DataFrame."""
 
     logger.trace("df:\n{}".format(df))
 
     # Read model description
-    desc = fmpy.read_model_description(fmu)
+    desc = read_model_description(fmu)
+
+    # Represent the index only once for all columns
+    if time_is_relative is False:
+        timestamps, datetimes = datetime_index_to_arrays(df.index)
+        timestamps = timestamps.tolist()
+        datetimes = datetimes.tolist()
+    else:
+        timestamps = df.index.tolist()
 
     # Transform columns of dataframe to JSON-object
     data = []
     for cname in df.columns:
         # Find unit of quantity
-        model_variable = py_.find(desc.modelVariables, lambda x: x.name == cname)
+        model_variable = desc.variables[cname]
         if model_variable.unit is not None:
             unit = model_variable.unit
         else:
             unit = "1"
 
         # Transform dataframe to timeseries-object
-        ts_value_objects = json.loads(
-            df[cname]
-            .to_json(orient="table")
-            .replace("time", "timestamp")
-            .replace(cname, "value")
-        )["data"]
+        values = series_to_list(df[cname])
         if time_is_relative is False:
-            for x in ts_value_objects:
-                x["datetime"] = pendulum.parse(x["timestamp"]).isoformat()
-                x["timestamp"] = int(pendulum.parse(x["timestamp"]).format("x"))
+            ts_value_objects = [
+                {"timestamp": t, "value": v, "datetime": d}
+                for t, v, d in zip(timestamps, values, datetimes)
+            ]
+        else:
+            ts_value_objects = [
+                {"timestamp": t, "value": v} for t, v in zip(timestamps, values)
+            ]
 
         # Join label, unit and data
         data.append(
@@ -378,8 +655,23 @@ def df_to_repr_json(df, fmu, time_is_relative):
     return data
 
 
+def generate_ids(n, size=8):
+    """Generate `n` random IDs like `nanoid.generate(size=size)` at once."""
+
+    alphabet = np.array(list(nanoid_alphabet))
+    indices = np.frombuffer(os.urandom(n * size), dtype=np.uint8) & 63
+
+    return alphabet[indices].reshape(n, size).view(f"<U{size}").ravel().tolist()
+
+
 def df_to_repr_jsonld(df, fmu, time_is_relative):
-    """Render JSON-LD-representation of DataFrame."""
+    """
+    Render JSON-LD-representation of DataFrame.
+
+    The nodes are emitted directly in expanded form, i.e. the same
+    structure that rdflib's JSON-LD-serializer produces for a graph of
+    `sosa:Observation`s, but without building the graph first.
+    """
 
     logger.debug("df:\n{}".format(df))
 
@@ -390,14 +682,37 @@ def df_to_repr_jsonld(df, fmu, time_is_relative):
     }
 
     # Read model description
-    desc = fmpy.read_model_description(fmu)
+    desc = read_model_description(fmu)
+
+    # Represent the index as lexical form of `xsd:dateTimeStamp` only once
+    if time_is_relative is False:
+        _, times = datetime_index_to_arrays(df.index)
+        times = times.tolist()
+    else:
+        times = [str(x) for x in df.index.tolist()]
+
+    # Generate IDs for all observations at once
+    observation_ids = iter(generate_ids(df.size))
+
+    # Expand IRIs of classes and properties only once
+    observable_property = str(SOSA.ObservableProperty)
+    observation = str(SOSA.Observation)
+    has_result = str(SOSA.hasResult)
+    observed_property = str(SOSA.observedProperty)
+    phenomenon_time = str(SOSA.phenomenonTime)
+    quantity_value = str(QUDT.QuantityValue)
+    numeric_value = str(QUDT.numericValue)
+    qudt_unit = str(QUDT.unit)
+    instant = str(TIME.Instant)
+    in_xsd_date_time_stamp = str(TIME.inXSDDateTimeStamp)
+    date_time_stamp = str(XSD.dateTimeStamp)
 
     # Iterate over columns of dataframe
-    graph = graph_bind_prefixes(rdflib.Graph())
+    graph = []
     for label, series in df.items():
         # Set unit to '1' if it is undefined
         # https://github.com/CATIA-Systems/FMPy/blob/master/fmpy/model_description.py#L154
-        model_variable = py_.find(desc.modelVariables, lambda x: x.name == label)
+        model_variable = desc.variables[label]
         if model_variable.unit is not None:
             unit = model_variable.unit
         else:
@@ -407,28 +722,177 @@ def df_to_repr_jsonld(df, fmu, time_is_relative):
 
         # Define `sosa:ObservableProperty` for each column
         observable_iri = f"#{label}"
-        observable_uriref = rdflib.URIRef(observable_iri)
-        graph.add((observable_uriref, RDF.type, SOSA.ObservableProperty))
+        graph.append({"@id": observable_iri, "@type": [observable_property]})
+
+        unit_iri = str(unit_map[unit])
+        for time, value in zip(times, series.astype(float).tolist()):
+            observation_id = f"#{next(observation_ids)}"
+            result_id = f"{observation_id}_result"
+            time_id = f"{observation_id}_time"
 
-        for index, value in series.items():
             # Define `sosa:Observation` for each row
-            observation_id = f"#{nanoid.generate(size=8)}"
-            observation_uriref = rdflib.URIRef(observation_id)
-            graph.add((observation_uriref, RDF.type, SOSA.Observation))
-            graph.add((observation_uriref, SOSA.observedProperty, observable_uriref))
+            graph.append(
+                {
+                    "@id": observation_id,
+                    "@type": [observation],
+                    has_result: [{"@id": result_id}],
+                    observed_property: [{"@id": observable_iri}],
+                    phenomenon_time: [{"@id": time_id}],
+                }
+            )
 
             # Define `qudt:QuantityValue` for each value
-            result_uriref = rdflib.URIRef(f"{observation_id}_result")
-            graph.add((result_uriref, RDF.type, QUDT.QuantityValue))
-            graph.add((result_uriref, QUDT.numericValue, rdflib.Literal(float(value))))
-            graph.add((result_uriref, QUDT.unit, unit_map[unit]))
-            graph.add((observation_uriref, SOSA.hasResult, result_uriref))
+            graph.append(
+                {
+                    "@id": result_id,
+                    "@type": [quantity_value],
+                    numeric_value: [{"@value": value}],
+                    qudt_unit: [{"@id": unit_iri}],
+                }
+            )
 
             # Define `time:Instant` for each index
-            time_uriref = rdflib.URIRef(f"{observation_id}_time")
-            time_literal = rdflib.Literal(index, datatype=XSD.dateTimeStamp)
-            graph.add((time_uriref, RDF.type, TIME.Instant))
-            graph.add((time_uriref, TIME.inXSDDateTimeStamp, time_literal))
-            graph.add((observation_uriref, SOSA.phenomenonTime, time_uriref))
+            graph.append(
+                {
+                    "@id": time_id,
+                    "@type": [instant],
+                    in_xsd_date_time_stamp: [
+                        {"@type": date_time_stamp, "@value": time}
+                    ],
+                }
+            )
+
+    return graph
+
+
+def encode_array(array, dtype, compression=None):
+    """Encode array as base64-string of its bytes, optionally compressed."""
+
+    data = np.ascontiguousarray(array, dtype=dtype).tobytes()
+    if compression == "zlib":
+        data = zlib.compress(data)
+    elif compression is not None:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    return base64.b64encode(data).decode("ascii")
+
+
+def decode_array(data, dtype, compression=None):
+    """Decode array encoded by `encode_array`."""
+
+    data = base64.b64decode(data)
+    if compression == "zlib":
+        data = zlib.decompress(data)
+    elif compression is not None:
+        raise ValueError(f"Unsupported compression: {compression}")
+
+    return np.frombuffer(data, dtype=dtype)
+
+
+def df_to_repr_columnar(df, fmu, time_is_relative, compression=None):
+    """
+    Render compact columnar representation of DataFrame.
+
+    The time axis is shared by all columns. Absolute time is encoded as
+    milliseconds since epoch (int64), relative time as seconds (float64);
+    values are encoded as float64. All numbers are little-endian.
+    """
+
+    # Read model description
+    desc = read_model_description(fmu)
+
+    # Encode time axis only once
+    if time_is_relative is False:
+        timestamps, _ = datetime_index_to_arrays(df.index)
+        time = {"unit": "ms", "dtype": "<i8"}
+    else:
+        timestamps = df.index.to_numpy(dtype=float)
+        time = {"unit": "s", "dtype": "<f8"}
+    time["data"] = encode_array(timestamps, time["dtype"], compression)
+
+    # Encode each column as array of values
+    columns = []
+    for cname in df.columns:
+        model_variable = desc.variables[cname]
+        if model_variable.unit is not None:
+            unit = model_variable.unit
+        else:
+            unit = "1"
+
+        columns.append(
+            {
+                "label": cname,
+                "unit": unit,
+                "dtype": "<f8",
+                "data": encode_array(df[cname], "<f8", compression),
+            }
+        )
+
+    return {
+        "encoding": "base64",
+        "compression": compression,
+        "length": len(df),
+        "time": time,
+        "columns": columns,
+    }
+
+
+def repr_columnar_to_df(data):
+    """Turn columnar representation back into pd.DataFrame."""
+
+    compression = data["compression"]
+
+    time = decode_array(data["time"]["data"], data["time"]["dtype"], compression)
+    if data["time"]["unit"] == "ms":
+        index = pd.DatetimeIndex(time * 10**6).tz_localize("utc")
+    else:
+        index = pd.Index(time, dtype="float")
+    index.name = "time"
+
+    columns = {}
+    for column in data["columns"]:
+        columns[column["label"]] = decode_array(
+            column["data"], column["dtype"], compression
+        )
+
+    return pd.DataFrame(columns, index=index)
+
+
+# Representations of simulation results that can be requested by name
+RESULT_REPRESENTATIONS = {
+    "json": df_to_repr_json,
+    "ld+json": df_to_repr_jsonld,
+    "columnar": df_to_repr_columnar,
+    "columnar+zlib": functools.partial(df_to_repr_columnar, compression="zlib"),
+}
+DEFAULT_RESULT_FORMATS = ["json", "ld+json"]
+
+
+def check_result_formats(formats):
+    """Raise ValueError iff a requested representation is unknown."""
+
+    unknown = [x for x in formats if x not in RESULT_REPRESENTATIONS]
+    if len(unknown) > 0:
+        raise ValueError(f"Unsupported result format(s): {', '.join(unknown)}")
+
+
+def df_to_repr(df, fmu, time_is_relative, formats=None, timings=None):
+    """
+    Render the requested representations of DataFrame only.
+
+    The duration of rendering each representation is added to
+    `timings`, if given.
+    """
+
+    if formats is None:
+        formats = DEFAULT_RESULT_FORMATS
+    check_result_formats(formats)
+    if timings is None:
+        timings = Timings()
+
+    result = {}
+    for format in formats:
+        with timings.measure(f"serialize:{format}"):
+            result[format] = RESULT_REPRESENTATIONS[format](df, fmu, time_is_relative)
 
-    return json.loads(graph.serialize(format="application/ld+json"))
+    return result